@@ -41,6 +41,38 @@ RANDOM_SEED = 42
 random.seed(RANDOM_SEED)
 
 
+# Every column read by the helpers below; anything else is dropped before Arrow → Python conversion
+USED_COLUMNS = (
+    # five-tuple
+    "src_ip", "source_ip", "src", "id.orig_h",
+    "dst_ip", "destination_ip", "dst", "id.resp_h",
+    "src_port", "sport", "src_port_num", "id.orig_p", "Src Port",
+    "dst_port", "dport", "dst_port_num", "id.resp_p", "Dst Port",
+    "protocol", "proto",
+    # prompt fields
+    "duration", "flow_duration", "orig_bytes", "resp_bytes", "total_bytes", "bytes",
+    "flags", "tcp_flags", "history", "device", "hostname",
+    # labels, scenario, family
+    "label", "binary_label", "Attack_label",
+    "scenario", "Scenario", "Label", "conn_state", "service",
+    "attack_type", "family",
+)  # fmt: skip
+
+
+def load_rows(ds: Any) -> List[Dict[str, Any]]:
+    """Materialize the used columns of an HF Dataset as row dicts, decoding bytes values.
+
+    Columns are pulled from Arrow in bulk (one conversion per column) and then
+    zipped into rows, instead of converting every column of every row.
+    """
+    names = [c for c in ds.column_names if c in USED_COLUMNS]
+    columns = ds.select_columns(names).to_dict()
+    rows: List[Dict[str, Any]] = []
+    for values in zip(*(columns[c] for c in names)):
+        rows.append({c: (v.decode() if isinstance(v, bytes) else v) for c, v in zip(names, values)})
+    return rows
+
+
 def five_tuple_key(row: Dict[str, Any]) -> str:
     # Works with common IoT-23 HF variants; fall back gracefully
     src = str(row.get("src_ip") or row.get("source_ip") or row.get("src") or row.get("id.orig_h") or "?")
@@ -56,12 +88,15 @@ def five_tuple_key(row: Dict[str, Any]) -> str:
     return hashlib.sha256(t.encode()).hexdigest()[:16]
 
 
+PORT_COLUMNS = {
+    "src": ("src_port", "sport", "id.orig_p", "Src Port"),
+    "dst": ("dst_port", "dport", "id.resp_p", "Dst Port"),
+}
+
+
 def get_port(row: Dict[str, Any], port_type: str) -> str:
     """Extract port with fallback for multiple column names."""
-    if port_type == "src":
-        candidates = ["src_port", "sport", "id.orig_p", "Src Port"]
-    else:
-        candidates = ["dst_port", "dport", "id.resp_p", "Dst Port"]
+    candidates = PORT_COLUMNS["src" if port_type == "src" else "dst"]
 
     for col in candidates:
         if col in row and row[col] is not None:
@@ -91,11 +126,17 @@ def render_prompt(row: Dict[str, Any]) -> str:
     )
 
 
+# Exact-match fast path for the label spellings seen in IoT-23 HF variants
+_LABELS = {"malicious": "Malicious", "benign": "Benign", "1": "Malicious", "0": "Benign"}
+
+
 def normalize_label(row: Dict[str, Any]) -> str:
     lbl = str(row.get("label") or row.get("binary_label") or row.get("Attack_label") or "").lower()
-    if "malicious" in lbl or "mal" in lbl or lbl == "1":
-        return "Malicious"
-    return "Benign"
+    known = _LABELS.get(lbl)
+    if known is not None:
+        return known
+    # Composite labels such as "PartOfAHorizontalPortScan-Malicious"
+    return "Malicious" if "mal" in lbl else "Benign"
 
 
 def stratified_sample(rows: List[Dict[str, Any]], n_per_class: int) -> List[Dict[str, Any]]:
@@ -134,8 +175,9 @@ def split_by_scenario(
     """
     from collections import defaultdict
 
-    # Group by scenario and label to maintain balance
-    by_scn_label = defaultdict(list)
+    # Group by scenario and label to maintain balance. Tuple keys avoid building
+    # a throwaway "scn:label" string per row.
+    by_scn_label: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
     for r in rows:
         scn = str(
             r.get("scenario")
@@ -145,26 +187,20 @@ def split_by_scenario(
             or r.get("service")
             or "unknown"
         )
-        label = r.get("label") or r.get("binary_label") or "unknown"
-        key = f"{scn}:{label}"
-        by_scn_label[key].append(r)
+        label = str(r.get("label") or r.get("binary_label") or "unknown")
+        by_scn_label[(scn, label)].append(r)
 
-    # Split each scenario:label group proportionally
-    paired = []
+    # Split each scenario:label group proportionally by slicing at the cut points
+    paired: List[Tuple[Dict[str, Any], str]] = []
     for group_rows in by_scn_label.values():
         random.shuffle(group_rows)
         n = len(group_rows)
         train_cut = int(n * train_p)
         dev_cut = int(n * (train_p + dev_p))
 
-        for i, r in enumerate(group_rows):
-            if i < train_cut:
-                split = "train"
-            elif i < dev_cut:
-                split = "dev"
-            else:
-                split = "test"
-            paired.append((r, split))
+        paired.extend((r, "train") for r in group_rows[:train_cut])
+        paired.extend((r, "dev") for r in group_rows[train_cut:dev_cut])
+        paired.extend((r, "test") for r in group_rows[dev_cut:])
 
     # Final shuffle to mix scenarios
     random.shuffle(paired)
@@ -195,12 +231,7 @@ def main():
     # Use HF_TOKEN from environment if available
     token = os.environ.get("HF_TOKEN")
     ds = load_dataset(args.hf_id, split="train", token=token)  # many HF variants expose a 'train' split
-    # Convert dataset items to Dict[str, Any], handling potential bytes values
-    rows: List[Dict[str, Any]] = []
-    for x in ds:
-        # HF datasets return dict-like objects; ensure we normalize to Dict[str, Any]
-        row_dict = {str(k): (v.decode() if isinstance(v, bytes) else v) for k, v in dict(x).items()}  # type: ignore[arg-type]
-        rows.append(row_dict)
+    rows = load_rows(ds)
 
     rows = dedup(rows)
     # Balance classes for a compact baseline
@@ -239,8 +270,7 @@ def main():
     sampling_path = outdir / f"sampling-iot23{suffix}.json"
 
     with data_path.open("w") as f:
-        for ex in out:
-            f.write(json.dumps(ex) + "\n")
+        f.writelines(json.dumps(ex) + "\n" for ex in out)
 
     stats = {
         "mode": args.mode,
@@ -255,7 +285,8 @@ def main():
     if args.mode == "test":
         stats["warning"] = "CI fixture only - not for evaluation"
 
-    sampling_path.write_text(json.dumps(stats, indent=2))
+    with sampling_path.open("w") as f:
+        json.dump(stats, f, indent=2)
     print(f"Wrote {data_path} ({stats})")
 
 
@@ -9,6 +9,7 @@ Outputs under environments/sv-env-network-logs/data/:
 """
 
 import argparse
+import hashlib
 import json
 import os
 import random
@@ -30,19 +31,11 @@ def norm_label(s: str) -> str:
     return "Malicious"
 
 
-def h(x: str) -> str:
-    import hashlib as H
-
-    return H.sha256(x.encode()).hexdigest()[:16]
-
-
 def content_hash_key(row) -> str:
     """
     Generate content-based hash for deduplication.
     Uses flow metadata beyond just 5-tuple to reduce false duplicates.
     """
-    import hashlib as H
-
     src = str(row.get("src_ip") or row.get("srcip") or "?")
     dst = str(row.get("dst_ip") or row.get("dstip") or "?")
     sp = str(row.get("sport") or row.get("src_port") or row.get("Src Port") or "?")
@@ -57,7 +50,7 @@ def content_hash_key(row) -> str:
     service = str(row.get("service") or row.get("Service") or "?")
 
     key = f"{src}|{dst}|{sp}|{dp}|{proto}|{sbytes}|{dbytes}|{dur}|{state}|{service}"
-    return H.sha256(key.encode()).hexdigest()[:16]
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
 
 
 def to_item(row, source: str, split="ood", force_malicious=False):
@@ -108,6 +101,35 @@ def to_item(row, source: str, split="ood", force_malicious=False):
     }
 
 
+def write_jsonl_with_stats(path: Path, items, hf_id: str) -> dict:
+    """
+    Stream items to a JSONL file and collect their sampling stats in the same pass.
+    Returns the per-dataset entry for the sampling metadata file.
+    """
+    from collections import Counter
+
+    labels = {"Malicious": 0, "Benign": 0}
+    attack_counts: Counter = Counter()
+    hashes = set()
+    total = 0
+    with path.open("w") as f:
+        for item in items:
+            f.write(json.dumps(item) + "\n")
+            total += 1
+            if item["answer"] in labels:
+                labels[item["answer"]] += 1
+            attack_counts[item["meta"]["attack_family"]] += 1
+            hashes.add(item["meta"]["hash"])
+
+    return {
+        "hf_id": hf_id,
+        "total": total,
+        "labels": labels,
+        "attack_families": dict(attack_counts),
+        "unique_hashes": len(hashes),
+    }
+
+
 def dedup_by_hash(items):
     """Remove duplicate items by hash, keeping first occurrence."""
     seen = set()
@@ -211,6 +233,12 @@ def main():
     ap.add_argument("--unsw-id", default="Mireu-Lab/UNSW-NB15", help="HF id for UNSW-NB15 dataset")
     ap.add_argument("--n", type=int, default=600)
     ap.add_argument("--outdir", default="environments/sv-env-network-logs/data")
+    ap.add_argument(
+        "--num-proc",
+        type=int,
+        default=None,
+        help="Worker processes for downloading/decoding the non-streamed UNSW-NB15 shards",
+    )
     ap.add_argument(
         "--mode",
         choices=["full", "test"],
@@ -236,20 +264,15 @@ def main():
     print(f"Building CIC-IDS-2017 OOD dataset (target: {args.n} samples)...")
     cic: Dataset = load_dataset(args.cic_id, split="train", streaming=True, token=token)  # type: ignore[assignment]
     cic_items = stratified_sample_cic(cic, args.n, token)
-    (outdir / f"cic-ids-2017-ood{suffix}.jsonl").write_text("\n".join(map(json.dumps, cic_items)) + "\n")
+    cic_stats = write_jsonl_with_stats(outdir / f"cic-ids-2017-ood{suffix}.jsonl", cic_items, args.cic_id)
 
     # UNSW-NB15 OOD (has labels)
     print(f"\nBuilding UNSW-NB15 OOD dataset (target: {args.n} samples)...")
-    unsw: Dataset = load_dataset(args.unsw_id, split="train", token=token)  # type: ignore[assignment]
+    unsw: Dataset = load_dataset(args.unsw_id, split="train", token=token, num_proc=args.num_proc)  # type: ignore[assignment]
     unsw_items = stratified_sample_unsw(unsw, args.n, token)
-    (outdir / f"unsw-nb15-ood{suffix}.jsonl").write_text("\n".join(map(json.dumps, unsw_items)) + "\n")
+    unsw_stats = write_jsonl_with_stats(outdir / f"unsw-nb15-ood{suffix}.jsonl", unsw_items, args.unsw_id)
 
     # Write sampling metadata
-    from collections import Counter
-
-    cic_attack_counts = Counter(x["meta"]["attack_family"] for x in cic_items)
-    unsw_attack_counts = Counter(x["meta"]["attack_family"] for x in unsw_items)
-
     sampling_path = outdir / f"sampling-e1-ood{suffix}.json"
     stats = {
         "mode": args.mode,
@@ -257,35 +280,19 @@ def main():
         "n_requested": args.n,
         "deduplication": "content-based (5-tuple + bytes + duration + state + service)",
         "datasets": {
-            "cic-ids-2017": {
-                "hf_id": args.cic_id,
-                "total": len(cic_items),
-                "labels": {
-                    "Malicious": sum(1 for x in cic_items if x["answer"] == "Malicious"),
-                    "Benign": sum(1 for x in cic_items if x["answer"] == "Benign"),
-                },
-                "attack_families": dict(cic_attack_counts),
-                "unique_hashes": len(set(x["meta"]["hash"] for x in cic_items)),
-            },
-            "unsw-nb15": {
-                "hf_id": args.unsw_id,
-                "total": len(unsw_items),
-                "labels": {
-                    "Malicious": sum(1 for x in unsw_items if x["answer"] == "Malicious"),
-                    "Benign": sum(1 for x in unsw_items if x["answer"] == "Benign"),
-                },
-                "attack_families": dict(unsw_attack_counts),
-                "unique_hashes": len(set(x["meta"]["hash"] for x in unsw_items)),
-            },
+            "cic-ids-2017": cic_stats,
+            "unsw-nb15": unsw_stats,
         },
     }
     if args.mode == "test":
         stats["warning"] = "CI fixture only - not for evaluation"
 
-    sampling_path.write_text(json.dumps(stats, indent=2))
+    # Encode once; the same text is written to disk and echoed below
+    stats_text = json.dumps(stats, indent=2)
+    sampling_path.write_text(stats_text)
     print(f"\n✅ Wrote OOD datasets to {outdir}")
     print("Sampling metadata:")
-    print(json.dumps(stats, indent=2))
+    print(stats_text)
 
 
 if __name__ == "__main__":
@@ -13,14 +13,23 @@ Outputs (under environments/sv-env-config-verification/data/):
 
 import argparse
 import json
+import mmap
 import os
+import shelve
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, nullcontext
+from hashlib import sha256
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, MutableMapping, Set, Tuple
 
 KUBELINTER = os.environ.get("KUBELINTER", "kube-linter")
 SEMGREP = os.environ.get("SEMGREP", "semgrep")
 OPA = os.environ.get("OPA", "opa")
+PATCH = os.environ.get("PATCH", "patch")
+
+# Write buffer for JSONL outputs; items embed whole manifests, so lines are large
+JSONL_BUFFER_SIZE = 1 << 20
 
 
 def run(cmd: List[str]) -> Tuple[int, str, str]:
@@ -53,62 +62,93 @@ def get_version(binary: str, flag: str = "version") -> str:
     return "unknown"
 
 
-def is_valid_k8s_manifest(path: Path) -> bool:
-    """Check if file contains valid K8s manifest."""
+# K8s API markers (need at least 2 to be confident) and HCL block markers (any one)
+K8S_MARKERS = (b"apiVersion:", b"kind:", b"metadata:", b"spec:")
+HCL_MARKERS = (b"resource ", b"module ", b"data ", b"variable ", b"output ", b"provider ", b"terraform ")
+
+
+def _has_markers(path: Path, markers: Tuple[bytes, ...], needed: int) -> bool:
+    """Check whether at least `needed` markers occur in the file.
+
+    Searches the raw bytes through mmap instead of decoding the whole file;
+    the markers are ASCII, so matching bytes is equivalent to matching text.
+    Empty and unreadable files never match.
+    """
     try:
-        content = path.read_text(encoding="utf-8", errors="ignore")
-    except Exception:
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return False
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                found = 0
+                for marker in markers:
+                    if mm.find(marker) != -1:
+                        found += 1
+                        if found >= needed:
+                            return True
+    except (OSError, ValueError):
         return False
+    return False
 
-    # Skip empty files
-    if not content.strip():
-        return False
 
-    # Check for K8s API markers (need at least 2 to be confident)
-    k8s_markers = ["apiVersion:", "kind:", "metadata:", "spec:"]
-    marker_count = sum(1 for marker in k8s_markers if marker in content)
-    return marker_count >= 2
+def is_valid_k8s_manifest(path: Path) -> bool:
+    """Check if file contains valid K8s manifest."""
+    return _has_markers(path, K8S_MARKERS, needed=2)
 
 
 def is_valid_hcl(path: Path) -> bool:
     """Check if file contains valid Terraform HCL."""
-    try:
-        content = path.read_text(encoding="utf-8", errors="ignore")
-    except Exception:
-        return False
+    return _has_markers(path, HCL_MARKERS, needed=1)
 
-    # Skip empty files
-    if not content.strip():
-        return False
 
-    # Check for HCL block markers
-    hcl_markers = ["resource ", "module ", "data ", "variable ", "output ", "provider ", "terraform "]
-    return any(marker in content for marker in hcl_markers)
+def _iter_files(root: Path, exts: Tuple[str, ...]) -> Iterator[str]:
+    """Yield paths of regular files under root whose suffix is in exts.
+
+    Uses os.scandir so type checks come from the directory entries, and filters
+    on the name before any Path object is built.
+    """
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in exts and entry.is_file():
+                        yield entry.path
+        except OSError:
+            continue
+
 
+def find_files(root: Path, exts: Tuple[str, ...], validator=None, jobs: int = 1) -> List[Path]:
+    """Find files by extension, optionally filtering by content validator.
 
-def find_files(root: Path, exts: Tuple[str, ...], validator=None) -> List[Path]:
-    """Find files by extension, optionally filtering by content validator."""
-    files = [p for p in root.rglob("*") if p.suffix.lower() in exts and p.is_file()]
+    Results are sorted so builds are reproducible across filesystems; the
+    validator (which reads each file) runs on up to `jobs` threads.
+    """
+    files = sorted(Path(p) for p in _iter_files(root, exts))
     if validator:
         original_count = len(files)
-        files = [f for f in files if validator(f)]
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            keep = list(pool.map(validator, files))
+        files = [f for f, ok in zip(files, keep) if ok]
         filtered_count = original_count - len(files)
         if filtered_count > 0:
             print(f"  Filtered out {filtered_count} invalid files (empty or wrong content)")
     return files
 
 
-def kubelinter_scan(path: Path) -> List[Dict[str, Any]]:
+def kubelinter_scan(path: Path) -> Tuple[List[Dict[str, Any]], bool]:
+    """Lint one manifest; returns (issues, ok) where ok is False if kube-linter failed."""
     rc, out, err = run([KUBELINTER, "lint", str(path), "--format", "json"])
     if rc != 0 and not out.strip():
-        # kube-linter exits nonzero when issues found; still parse stdout
-        pass
+        # kube-linter exits nonzero when issues found, but always prints its JSON report
+        return [], False
     try:
         data = json.loads(out or "{}")
     except json.JSONDecodeError:
-        return []
+        return [], False
     if data is None:
-        return []
+        return [], True
     issues = []
     for d in data.get("Reports", []) or []:
         issues.append(
@@ -120,131 +160,389 @@ def kubelinter_scan(path: Path) -> List[Dict[str, Any]]:
                 "loc": d.get("Object", {}).get("K8sObject", {}).get("Object", ""),
             }
         )
-    return issues
+    return issues, True
+
+
+# Semgrep registry rulesets per language. They are fetched at scan time and can
+# change without a Semgrep release, so the scan cache cannot detect rule updates
+SEMGREP_RULESETS = {"k8s": "p/kubernetes", "tf": "p/terraform"}
+
+# Paths per batched Semgrep invocation; keeps the command line well under ARG_MAX
+SEMGREP_BATCH_SIZE = 500
+
+# No telemetry or update check, scan exactly the paths given, and bound per-file
+# memory (MiB) so one pathological file can't stall a batch. Semgrep's default
+# per-rule timeout (5s per file) already bounds time, so it is not overridden
+SEMGREP_FLAGS = ("--metrics=off", "--disable-version-check", "--no-git-ignore", "--max-memory", "2000")
+
+
+def _semgrep_issue(r: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "tool": "semgrep",
+        "rule_id": r.get("check_id", ""),
+        "severity": (r.get("extra", {}) or {}).get("severity", "unknown"),
+        "msg": (r.get("extra", {}) or {}).get("message", ""),
+        "loc": f"{r.get('path', '')}:{r.get('start', {}).get('line', '')}",
+    }
 
 
-def semgrep_scan(path: Path, lang: str) -> List[Dict[str, Any]]:
-    # Use community rulesets; for TF: p/terraform; for K8s YAML: p/kubernetes
-    ruleset = "p/kubernetes" if lang == "k8s" else "p/terraform"
-    rc, out, err = run([SEMGREP, "scan", "--json", "--quiet", "--config", ruleset, str(path)])
+def _semgrep_output(rc: int, out: str) -> Dict[str, Any] | None:
+    """Parse Semgrep's JSON report, or return None when the run failed."""
     if rc not in (0, 1):  # 1 means findings found
-        return []
-    data = json.loads(out or "{}")
-    issues = []
-    for r in data.get("results", []):
-        issues.append(
-            {
-                "tool": "semgrep",
-                "rule_id": r.get("check_id", ""),
-                "severity": (r.get("extra", {}) or {}).get("severity", "unknown"),
-                "msg": (r.get("extra", {}) or {}).get("message", ""),
-                "loc": f"{r.get('path', '')}:{r.get('start', {}).get('line', '')}",
-            }
-        )
-    return issues
+        return None
+    try:
+        data = json.loads(out or "{}")
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
 
 
-def opa_eval_policies(path: Path, rego_dir: Path) -> List[Dict[str, Any]]:
-    # Evaluate all .rego in rego_dir against the file content; expect boolean "deny" results
-    if not rego_dir or not rego_dir.exists():
-        return []
-    policies = list(rego_dir.glob("*.rego"))
-    issues = []
-    for rego in policies:
-        # Assume package provides 'deny' set of strings
-        rc, out, err = run([OPA, "eval", "-f", "json", "-d", str(rego), "-I", str(path), "data.deny"])
-        if rc != 0:
-            continue
-        try:
-            data = json.loads(out)
-        except json.JSONDecodeError:
+def semgrep_scan(path: Path, lang: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """Scan one file; returns (issues, ok) where ok is False if Semgrep failed or reported errors."""
+    ruleset = SEMGREP_RULESETS[lang]
+    rc, out, err = run([SEMGREP, "scan", *SEMGREP_FLAGS, "--json", "--quiet", "--config", ruleset, str(path)])
+    data = _semgrep_output(rc, out)
+    if data is None:
+        return [], False
+    return [_semgrep_issue(r) for r in data.get("results", [])], not data.get("errors")
+
+
+def semgrep_scan_batch(
+    paths: List[Path], lang: str, jobs: int = 1
+) -> Tuple[Dict[str, List[Dict[str, Any]]], Set[str]]:
+    """Scan many files with one Semgrep invocation per batch, grouping findings by path.
+
+    Semgrep's startup and ruleset compilation dominate per-file scans of small
+    manifests, so paying them once per batch instead of once per file is the main win.
+    A batch that fails is rescanned file by file with semgrep_scan, so one bad
+    file cannot drop the findings of the rest of its batch.
+
+    Returns the findings by path and the paths whose results may be incomplete
+    (Semgrep failed or reported errors for them).
+    """
+    by_path: Dict[str, List[Dict[str, Any]]] = {}
+    failed: Set[str] = set()
+    for start in range(0, len(paths), SEMGREP_BATCH_SIZE):
+        batch = [str(p) for p in paths[start : start + SEMGREP_BATCH_SIZE]]
+        cmd = [
+            SEMGREP,
+            "scan",
+            *SEMGREP_FLAGS,
+            "--json",
+            "--quiet",
+            "--jobs",
+            str(max(1, jobs)),
+            "--config",
+            SEMGREP_RULESETS[lang],
+        ]
+        rc, out, err = run(cmd + batch)
+        data = _semgrep_output(rc, out)
+        if data is None:
+            for path in batch:
+                issues, ok = semgrep_scan(Path(path), lang)
+                if issues:
+                    by_path[path] = issues
+                if not ok:
+                    failed.add(path)
             continue
-        for r in data.get("result") or []:
-            for expr in r.get("expressions", []):
-                val = expr.get("value") or []
-                for msg in val:
-                    issues.append(
-                        {"tool": "opa", "rule_id": rego.stem, "severity": "high", "msg": str(msg), "loc": ""}
-                    )
-    return issues
+        for r in data.get("results", []):
+            by_path.setdefault(r.get("path", ""), []).append(_semgrep_issue(r))
+        for e in data.get("errors") or []:
+            # Errors without a path cannot be attributed, so distrust the whole batch
+            path = e.get("path") if isinstance(e, dict) else None
+            if path:
+                failed.add(path)
+            else:
+                failed.update(batch)
+    return by_path, failed
+
+
+# Rego policy set per language, loaded together in one `opa eval`. Both sets
+# declare `package security` and use different Rego syntax versions, so they must
+# never be mixed; the K8s set is the one sv_env_config_verification.py loads
+OPA_POLICY_SETS = {
+    "k8s": ("lib.rego", "kubernetes_security.rego"),
+    "tf": ("terraform_lib.rego", "terraform_security.rego"),
+}
+# The Terraform policies still use pre-1.0 Rego syntax
+OPA_FLAGS = {"tf": ("--v0-compatible",)}
+OPA_QUERY = "data.security.deny"
+# Inputs `opa eval --input` can load. OPA has no HCL parser, so .tf files are not
+# evaluated (the environment skips them as well)
+OPA_INPUT_SUFFIXES = (".json", ".yaml", ".yml")
+
 
+def opa_eval_policies(path: Path, rego_dir: Path, lang: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """Evaluate the `lang` policy set against one file.
 
-def read_text(p: Path) -> str:
+    Returns (issues, ok); ok is False when OPA failed, so the issues may be incomplete.
+    """
+    if not rego_dir or path.suffix.lower() not in OPA_INPUT_SUFFIXES:
+        return [], True
+    names = OPA_POLICY_SETS.get(lang, ())
+    policies = [rego_dir / name for name in names if (rego_dir / name).exists()]
+    if not policies:
+        return [], True
+    cmd = [OPA, "eval", "-f", "json", *OPA_FLAGS.get(lang, ())]
+    for rego in policies:
+        cmd += ["-d", str(rego)]
+    rc, out, err = run(cmd + ["-i", str(path), OPA_QUERY])
+    if rc != 0:
+        return [], False
+    try:
+        data = json.loads(out)
+    except json.JSONDecodeError:
+        return [], False
+    # Plain-string deny messages carry no id; attribute them to the policy file
+    default_rule_id = Path(names[-1]).stem
+    issues = []
+    for r in data.get("result") or []:
+        for expr in r.get("expressions", []):
+            val = expr.get("value") or []
+            for msg in val:
+                details = msg if isinstance(msg, dict) else {}
+                issues.append(
+                    {
+                        "tool": "opa",
+                        "rule_id": str(details.get("id") or default_rule_id),
+                        "severity": str(details.get("severity") or "high").lower(),
+                        "msg": str(details.get("message") or msg),
+                        "loc": "",
+                    }
+                )
+    return issues, True
+
+
+def decode_text(data: bytes) -> str:
+    """Decode file bytes the way Path.read_text() would, universal newlines included.
+
+    meta.hash is taken over this text, and validate_e2_datasets.py's
+    hash_source_file repeats the same decoding to recompute it; keep the two in sync.
+    """
     try:
-        return p.read_text(encoding="utf-8")
-    except Exception:
-        return p.read_text(errors="ignore")
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        text = data.decode("utf-8", errors="ignore")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def scan_issues(
+    f: Path, lang: str, rego_dir: Path, semgrep_issues: List[Dict[str, Any]], semgrep_ok: bool = True
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Run the per-file scanners for f.
+
+    `semgrep_issues` and `semgrep_ok` carry this file's result from semgrep_scan_batch.
+    Returns (issues, ok); ok is False when any scanner failed, so the findings
+    may be incomplete.
+    """
+    issues = []
+    ok = semgrep_ok
+    if lang == "k8s":
+        kl_issues, kl_ok = kubelinter_scan(f)
+        issues += kl_issues
+        ok = ok and kl_ok
+    issues += semgrep_issues
+    opa_issues, opa_ok = opa_eval_policies(f, rego_dir, lang)
+    issues += opa_issues
+    return issues, ok and opa_ok
+
+
+def make_item(f: Path, lang: str, issues: List[Dict[str, Any]], raw: str) -> Dict[str, Any]:
+    """Build the E2 item for f from its text `raw` (as returned by decode_text)."""
+    return {
+        "question": raw,
+        "info": {"violations": issues, "patch": None},
+        "meta": {"lang": lang, "source": str(f), "hash": short_hash(raw)},
+    }
 
 
-def emit_items(files: List[Path], lang: str, rego_dir: Path, out_path: Path) -> List[Dict[str, Any]]:
-    items = []
-    with out_path.open("w") as w:
+def scan_cache_salt(versions: Dict[str, str], rego_dir: Path) -> str:
+    """Fingerprint everything besides the scanned file that affects findings.
+
+    Tool versions, Semgrep flags and rulesets, the OPA invocation and the Rego
+    policies are folded in, so upgrading a scanner or editing a policy
+    invalidates every cached entry.
+    The contents of the Semgrep registry rulesets are not: after a registry rule
+    update, rebuild with --no-scan-cache.
+    """
+    h = sha256(json.dumps(versions, sort_keys=True).encode())
+    h.update("\0".join(SEMGREP_FLAGS).encode())
+    h.update(json.dumps(SEMGREP_RULESETS, sort_keys=True).encode())
+    h.update(json.dumps([OPA_POLICY_SETS, OPA_FLAGS, OPA_QUERY], sort_keys=True).encode())
+    if rego_dir and rego_dir.exists():
+        for rego in sorted(rego_dir.glob("*.rego")):
+            h.update(rego.name.encode() + b"\0" + rego.read_bytes())
+    return h.hexdigest()
+
+
+def scan_cache_key(digest: str, lang: str, salt: str) -> str:
+    return sha256(f"{salt}\0{lang}\0{digest}".encode()).hexdigest()
+
+
+def relocate_issues(issues: List[Dict[str, Any]], source: str, target: str) -> List[Dict[str, Any]]:
+    """Reuse findings from `source` for a byte-identical file at `target`.
+
+    Only Semgrep locations embed the scanned path, so those are rewritten.
+    """
+    if source == target:
+        return issues
+    prefix = source + ":"
+    out = []
+    for v in issues:
+        loc = v.get("loc", "")
+        if v.get("tool") == "semgrep" and loc.startswith(prefix):
+            v = {**v, "loc": f"{target}:{loc[len(prefix) :]}"}
+        out.append(v)
+    return out
+
+
+def emit_items(
+    files: List[Path],
+    lang: str,
+    rego_dir: Path,
+    out_path: Path,
+    jobs: int = 1,
+    cache: MutableMapping[str, Any] | None = None,
+    cache_salt: str = "",
+    semgrep_jobs: int | None = None,
+) -> Dict[str, int]:
+    """Scan files with up to `jobs` concurrent workers and write items in input order.
+
+    The work is dominated by scanner subprocesses, so threads are enough to keep
+    several of them running at once; results are written from this thread only.
+    A first pass hashes every file, keeping only the digest, and a file is
+    scanned only if it is the first with its content: byte-identical copies
+    reuse those findings, as do files whose content already has an entry in
+    `cache` (see scan_cache_key). Only scans where every scanner succeeded are
+    added to the cache. Each file is read again when its item is written, so
+    manifest text is never held for the whole corpus; only the `total` and
+    `with_violations` counts are returned.
+    """
+    digests: Dict[Path, str] = {}
+    # content digest -> (path the findings were produced for, findings)
+    found: Dict[str, Tuple[str, List[Dict[str, Any]]]] = {}
+    to_scan: List[Path] = []
+    seen: set = set()
+    for f in files:
+        digests[f] = digest = sha256(f.read_bytes()).hexdigest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        entry = cache.get(scan_cache_key(digest, lang, cache_salt)) if cache is not None else None
+        if entry is not None:
+            found[digest] = (entry["source"], entry["violations"])
+        else:
+            to_scan.append(f)
+    if len(seen) < len(files):
+        print(f"  Skipping {len(files) - len(seen)} files with duplicate content")
+    if found:
+        print(f"  Reusing cached scan results for {len(found)}/{len(seen)} unique files")
+
+    semgrep_by_path, semgrep_failed = semgrep_scan_batch(to_scan, lang, jobs=semgrep_jobs or jobs)
+
+    def scan(f: Path) -> Tuple[List[Dict[str, Any]], bool]:
+        path = str(f)
+        return scan_issues(f, lang, rego_dir, semgrep_by_path.get(path, []), path not in semgrep_failed)
+
+    stats = {"total": 0, "with_violations": 0}
+    failed_scans = 0
+    with (
+        out_path.open("w", buffering=JSONL_BUFFER_SIZE) as w,
+        ThreadPoolExecutor(max_workers=max(1, jobs)) as pool,
+    ):
+        # to_scan is in first-appearance order, so the next unseen digest below
+        # always belongs to the next result from this iterator
+        scanned = pool.map(scan, to_scan)
         for f in files:
-            raw = read_text(f)
-            issues = []
-            if lang == "k8s":
-                issues += kubelinter_scan(f)
-                issues += semgrep_scan(f, "k8s")
-            else:
-                issues += semgrep_scan(f, "tf")
-            issues += opa_eval_policies(f, rego_dir)
-            item = {
-                "question": raw,
-                "info": {"violations": issues, "patch": None},
-                "meta": {"lang": lang, "source": str(f), "hash": hashlib(raw)},
-            }
-            items.append(item)
+            digest = digests[f]
+            if digest not in found:
+                issues, ok = next(scanned)
+                found[digest] = (str(f), issues)
+                if not ok:
+                    # Possibly incomplete: keep for this build, but never cache it
+                    failed_scans += 1
+                elif cache is not None:
+                    cache[scan_cache_key(digest, lang, cache_salt)] = {
+                        "source": str(f),
+                        "violations": found[digest][1],
+                    }
+            source, issues = found[digest]
+            item = make_item(f, lang, relocate_issues(issues, source, str(f)), decode_text(f.read_bytes()))
             w.write(json.dumps(item) + "\n")
-    return items
+            stats["total"] += 1
+            stats["with_violations"] += bool(issues)
+    if failed_scans:
+        print(f"  Warning: scanners failed for {failed_scans} files; results may be incomplete (not cached)")
+    return stats
+
+
+def short_hash(s: str) -> str:
+    # Must stay truncated SHA-256: validate_e2_datasets.py recomputes it from the question
+    return sha256(s.encode()).hexdigest()[:16]
 
 
-def hashlib(s: str) -> str:
-    import hashlib as H
+def apply_patch(src: Path, patch_file: Path, out_path: Path) -> bool:
+    """Apply a unified diff to src with `patch`, writing the result to out_path.
+
+    The source file is left untouched; rejects land next to out_path.
+    Returns False when the patch does not apply cleanly.
+    """
+    if not src.exists():
+        return False
+    rc, _, _ = run([PATCH, "--batch", "--quiet", "-o", str(out_path), str(src), str(patch_file)])
+    return rc == 0
+
 
-    return H.sha256(s.encode()).hexdigest()[:16]
+def is_unified_diff(text: str) -> bool:
+    """True when text carries unified diff headers (`---`, `+++` or `@@` lines)."""
+    return any(line.startswith(("--- ", "+++ ", "@@")) for line in text.splitlines())
 
 
 def make_patch_verified(k8s_items_path: Path, patches_dir: Path, out_path: Path, rego_dir: Path):
     """
     For files with corresponding patch (*.patch or *.diff) in patches_dir,
     apply patch, re-scan, and keep only those where primary-oracle violations are gone.
+    A patch file without diff headers is taken as the full fixed manifest; a real diff
+    that `patch` rejects is skipped and counted rather than written out as a manifest.
+    Items are streamed from k8s_items_path and kept items are written as they pass.
     """
-    import difflib
     import tempfile
 
-    # Simple JSONL reader
-    items = [json.loads(line) for line in k8s_items_path.read_text().splitlines() if line.strip()]
-    kept = []
-    for it in items:
-        src = Path(it["meta"]["source"])
-        patch_file = patches_dir / (src.name + ".patch")
-        if not patch_file.exists():
-            continue
-        # Apply unified diff in memory (best-effort)
-        diff = patch_file.read_text().splitlines(keepends=True)
-        try:
-            patched = list(difflib.restore(diff, which=2))  # If diff was generated via difflib.ndiff
-        except Exception:
-            # Fallback: naive replacement when diff is a full file content
-            patched = patch_file.read_text().splitlines(keepends=True)
-        with tempfile.NamedTemporaryFile("w", delete=False, suffix=".yaml") as tmp:
-            tmp.writelines(patched)
-            tmp_path = Path(tmp.name)
-
-        # Re-scan with OPA as primary oracle + tools as corroboration
-        issues_after = (
-            opa_eval_policies(tmp_path, rego_dir) + kubelinter_scan(tmp_path) + semgrep_scan(tmp_path, "k8s")
-        )
-        if not any(v for v in issues_after if v["tool"] == "opa"):
-            kept.append(
-                {
-                    "question": "".join(patched),
-                    "info": {"violations": it["info"]["violations"], "patch": patch_file.read_text()},
+    kept = 0
+    rejected_patches = 0
+    with k8s_items_path.open() as r, out_path.open("w", buffering=JSONL_BUFFER_SIZE) as w:
+        for line in r:
+            if not line.strip():
+                continue
+            it = json.loads(line)
+            src = Path(it["meta"]["source"])
+            patch_file = patches_dir / (src.name + ".patch")
+            if not patch_file.exists():
+                continue
+            patch_text = patch_file.read_text()
+            with tempfile.TemporaryDirectory() as tmpdir:
+                tmp_path = Path(tmpdir) / src.name
+                if not apply_patch(src, patch_file, tmp_path):
+                    if is_unified_diff(patch_text):
+                        rejected_patches += 1
+                        continue
+                    # Fallback: naive replacement when the "patch" is full file content
+                    tmp_path.write_text(patch_text)
+                patched = tmp_path.read_text()
+
+                # Only the primary oracle decides; kube-linter/Semgrep findings were never used here
+                oracle_issues, oracle_ok = opa_eval_policies(tmp_path, rego_dir, "k8s")
+            if oracle_ok and not oracle_issues:
+                item = {
+                    "question": patched,
+                    "info": {"violations": it["info"]["violations"], "patch": patch_text},
                     "meta": {**it["meta"], "patch_source": str(patch_file)},
                 }
-            )
-    out_path.write_text("\n".join(map(json.dumps, kept)) + ("\n" if kept else ""))
-    return len(kept)
+                w.write(json.dumps(item) + "\n")
+                kept += 1
+    if rejected_patches:
+        print(f"  Warning: {rejected_patches} patches did not apply cleanly and were skipped")
+    return kept
 
 
 def main():
@@ -265,6 +563,28 @@ def main():
         default="full",
         help="Build mode: 'full' for production (uploaded to HF), 'test' for CI fixtures",
     )
+    ap.add_argument(
+        "--scan-cache",
+        type=Path,
+        default=Path(".cache/e2-scan-cache"),
+        help="Where per-file scan results are cached between runs (kept out of the packaged data dir)",
+    )
+    ap.add_argument(
+        "--no-scan-cache",
+        action="store_true",
+        help="Rescan every file instead of reusing cached results; required after Semgrep rule updates",
+    )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of files to scan concurrently (default: CPU count)",
+    )
+    ap.add_argument(
+        "--semgrep-jobs",
+        type=int,
+        help="Semgrep --jobs for batched scans (default: same as --jobs)",
+    )
     args = ap.parse_args()
 
     args.outdir.mkdir(parents=True, exist_ok=True)
@@ -281,15 +601,39 @@ def main():
     (args.outdir / "tools-versions.json").write_text(json.dumps(versions, indent=2))
 
     print(f"Scanning K8s manifests in {args.k8s_root}...")
-    k8s_files = find_files(args.k8s_root, (".yml", ".yaml"), validator=is_valid_k8s_manifest)
+    k8s_files = find_files(args.k8s_root, (".yml", ".yaml"), validator=is_valid_k8s_manifest, jobs=args.jobs)
     print(f"  Found {len(k8s_files)} valid K8s manifests")
 
     print(f"\nScanning Terraform files in {args.tf_root}...")
-    tf_files = find_files(args.tf_root, (".tf",), validator=is_valid_hcl)
+    tf_files = find_files(args.tf_root, (".tf",), validator=is_valid_hcl, jobs=args.jobs)
     print(f"  Found {len(tf_files)} valid Terraform files")
 
-    k8s_items = emit_items(k8s_files, "k8s", args.rego_dir, args.outdir / f"k8s-labeled{suffix}.jsonl")
-    tf_items = emit_items(tf_files, "tf", args.rego_dir, args.outdir / f"terraform-labeled{suffix}.jsonl")
+    # Scan results keyed by (tool versions, policies, content); see scan_cache_key
+    cache_salt = scan_cache_salt(versions, args.rego_dir)
+    if not args.no_scan_cache:
+        args.scan_cache.parent.mkdir(parents=True, exist_ok=True)
+    cache_ctx = nullcontext() if args.no_scan_cache else closing(shelve.open(str(args.scan_cache)))
+    with cache_ctx as cache:
+        k8s_stats = emit_items(
+            k8s_files,
+            "k8s",
+            args.rego_dir,
+            args.outdir / f"k8s-labeled{suffix}.jsonl",
+            jobs=args.jobs,
+            cache=cache,
+            cache_salt=cache_salt,
+            semgrep_jobs=args.semgrep_jobs,
+        )
+        tf_stats = emit_items(
+            tf_files,
+            "tf",
+            args.rego_dir,
+            args.outdir / f"terraform-labeled{suffix}.jsonl",
+            jobs=args.jobs,
+            cache=cache,
+            cache_salt=cache_salt,
+            semgrep_jobs=args.semgrep_jobs,
+        )
 
     patch_verified_count = 0
     if args.patches_dir and args.patches_dir.exists():
@@ -311,13 +655,13 @@ def main():
         "datasets": {
             "k8s": {
                 "files_scanned": len(k8s_files),
-                "total_items": len(k8s_items),
-                "with_violations": sum(1 for x in k8s_items if x["info"]["violations"]),
+                "total_items": k8s_stats["total"],
+                "with_violations": k8s_stats["with_violations"],
             },
             "terraform": {
                 "files_scanned": len(tf_files),
-                "total_items": len(tf_items),
-                "with_violations": sum(1 for x in tf_items if x["info"]["violations"]),
+                "total_items": tf_stats["total"],
+                "with_violations": tf_stats["with_violations"],
             },
         },
         "tools": versions,
@@ -0,0 +1,226 @@
+"""Tests for build_e2_k8s_tf.py scanning, caching and patch verification, using stub scanners."""
+
+import json
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import build_e2_k8s_tf as builder
+import pytest
+
+BAD = "apiVersion: v1\nkind: Pod\nmetadata:\n  name: bad\nspec:\n  hostNetwork: true\n"
+GOOD = "apiVersion: v1\nkind: Pod\nmetadata:\n  name: good\nspec: {}\n"
+
+
+class StubScanners:
+    """Stands in for `run`, answering like kube-linter, Semgrep and OPA.
+
+    Each tool checks its arguments the way the real CLI would parse them, flags
+    every file containing "bad", and fails for paths (or file names) listed in `fail`. `patch`
+    commands go to the real binary.
+    """
+
+    def __init__(self) -> None:
+        self._run = builder.run
+        self.calls: Counter = Counter()
+        self.fail: Dict[str, set] = {"kube-linter": set(), "opa": set()}
+        self.fail_semgrep_batches = False
+
+    def __call__(self, cmd: List[str]) -> Tuple[int, str, str]:
+        tool = cmd[0]
+        self.calls[tool] += 1
+        if tool == builder.KUBELINTER:
+            return self._kubelinter(cmd)
+        if tool == builder.SEMGREP:
+            return self._semgrep(cmd)
+        if tool == builder.OPA:
+            return self._opa(cmd)
+        if tool == builder.PATCH:
+            return self._run(cmd)
+        raise AssertionError(f"unexpected command {cmd}")
+
+    def _kubelinter(self, cmd: List[str]) -> Tuple[int, str, str]:
+        assert cmd[1] == "lint" and cmd[3:] == ["--format", "json"], cmd
+        path = cmd[2]
+        if path in self.fail["kube-linter"]:
+            return 2, "", "boom"
+        bad = "bad" in Path(path).read_text()
+        reports = [{"Check": "host-network", "Severity": "High", "Remediation": "fix"}] if bad else []
+        return (1 if bad else 0), json.dumps({"Reports": reports}), ""
+
+    def _semgrep(self, cmd: List[str]) -> Tuple[int, str, str]:
+        assert cmd[1] == "scan" and "--json" in cmd, cmd
+        config = cmd.index("--config")
+        assert cmd[config + 1] == "p/kubernetes", cmd
+        paths = cmd[config + 2 :]
+        if self.fail_semgrep_batches and len(paths) > 1:
+            return 2, "", "batch failed"
+        results = [
+            {"check_id": "r1", "path": p, "start": {"line": 1}, "extra": {"severity": "WARNING"}}
+            for p in paths
+            if "bad" in Path(p).read_text()
+        ]
+        return (1 if results else 0), json.dumps({"results": results, "errors": []}), ""
+
+    def _opa(self, cmd: List[str]) -> Tuple[int, str, str]:
+        assert cmd[1:4] == ["eval", "-f", "json"] and "-I" not in cmd, cmd
+        assert cmd[-1] == "data.security.deny", cmd
+        policies = [Path(cmd[i + 1]).name for i, arg in enumerate(cmd) if arg == "-d"]
+        assert policies == ["lib.rego", "kubernetes_security.rego"], policies
+        path = cmd[cmd.index("-i") + 1]
+        if {path, Path(path).name} & self.fail["opa"]:
+            return 1, "", "rego_parse_error"
+        deny = [{"id": "K8S_002", "message": "privileged", "severity": "HIGH"}]
+        value = deny if "bad" in Path(path).read_text() else []
+        return 0, json.dumps({"result": [{"expressions": [{"value": value}]}]}), ""
+
+
+@pytest.fixture
+def stub(monkeypatch: pytest.MonkeyPatch) -> StubScanners:
+    scanners = StubScanners()
+    monkeypatch.setattr(builder, "run", scanners)
+    return scanners
+
+
+@pytest.fixture
+def rego_dir(tmp_path: Path) -> Path:
+    policies = tmp_path / "policies"
+    policies.mkdir()
+    (policies / "lib.rego").write_text("package lib.kubernetes\n")
+    (policies / "kubernetes_security.rego").write_text("package security\n")
+    return policies
+
+
+def _write(root: Path, files: Dict[str, str]) -> List[Path]:
+    paths = []
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        paths.append(path)
+    return sorted(paths)
+
+
+def _emit(files: List[Path], rego_dir: Path, out: Path, cache: Dict[str, Any] | None) -> List[Dict[str, Any]]:
+    builder.emit_items(files, "k8s", rego_dir, out, jobs=2, cache=cache, cache_salt="salt")
+    return [json.loads(line) for line in out.read_text().splitlines()]
+
+
+class TestEmitItems:
+    """Tests for emit_items with the scan cache."""
+
+    def test_cache_miss_then_hit(self, tmp_path: Path, stub: StubScanners, rego_dir: Path):
+        """The first run scans and caches every file; the second reuses the cache and scans nothing."""
+        files = _write(tmp_path / "src", {"a.yaml": BAD, "b.yaml": GOOD})
+        cache: Dict[str, Any] = {}
+        first = _emit(files, rego_dir, tmp_path / "out1.jsonl", cache)
+
+        assert len(cache) == 2
+        assert stub.calls[builder.KUBELINTER] == 2
+        assert {v["tool"] for v in first[0]["info"]["violations"]} == {"kube-linter", "semgrep", "opa"}
+        assert first[0]["info"]["violations"][-1]["rule_id"] == "K8S_002"
+        assert first[1]["info"]["violations"] == []
+
+        stub.calls.clear()
+        second = _emit(files, rego_dir, tmp_path / "out2.jsonl", cache)
+        assert sum(stub.calls.values()) == 0
+        assert second == first
+
+    def test_duplicate_content_is_scanned_once_and_relocated(
+        self, tmp_path: Path, stub: StubScanners, rego_dir: Path
+    ):
+        """Byte-identical files reuse one scan, with Semgrep locations moved to each file."""
+        files = _write(tmp_path / "src", {"a.yaml": BAD, "copy/a.yaml": BAD})
+        items = _emit(files, rego_dir, tmp_path / "out.jsonl", {})
+
+        assert stub.calls[builder.KUBELINTER] == 1
+        assert stub.calls[builder.OPA] == 1
+        for item, path in zip(items, files):
+            semgrep = [v for v in item["info"]["violations"] if v["tool"] == "semgrep"]
+            assert semgrep[0]["loc"] == f"{path}:1"
+            assert item["meta"]["source"] == str(path)
+
+    def test_failed_semgrep_batch_falls_back_per_file(
+        self, tmp_path: Path, stub: StubScanners, rego_dir: Path
+    ):
+        """A failed batch is rescanned file by file, so no findings are lost."""
+        files = _write(tmp_path / "src", {"a.yaml": BAD, "b.yaml": GOOD, "c.yaml": BAD + "#c\n"})
+        stub.fail_semgrep_batches = True
+        cache: Dict[str, Any] = {}
+        items = _emit(files, rego_dir, tmp_path / "out.jsonl", cache)
+
+        assert stub.calls[builder.SEMGREP] == 1 + len(files)
+        flagged = [any(v["tool"] == "semgrep" for v in item["info"]["violations"]) for item in items]
+        assert flagged == [True, False, True]
+        assert len(cache) == 3
+
+    @pytest.mark.parametrize("tool", ["kube-linter", "opa"])
+    def test_scanner_failure_is_not_cached(
+        self, tmp_path: Path, stub: StubScanners, rego_dir: Path, tool: str
+    ):
+        """A file whose scan failed is still emitted but gets no cache entry, so the next run rescans it."""
+        files = _write(tmp_path / "src", {"a.yaml": BAD, "b.yaml": GOOD})
+        stub.fail[tool].add(str(files[0]))
+        cache: Dict[str, Any] = {}
+        items = _emit(files, rego_dir, tmp_path / "out.jsonl", cache)
+
+        assert len(items) == 2
+        assert [entry["source"] for entry in cache.values()] == [str(files[1])]
+
+        stub.fail[tool].clear()
+        stub.calls.clear()
+        _emit(files, rego_dir, tmp_path / "out2.jsonl", cache)
+        assert stub.calls[builder.KUBELINTER] == 1
+        assert len(cache) == 2
+
+
+@pytest.mark.skipif(shutil.which(builder.PATCH) is None, reason="patch(1) not installed")
+class TestMakePatchVerified:
+    """Tests for make_patch_verified."""
+
+    def _verify(self, tmp_path: Path, rego_dir: Path, patch_text: str) -> Tuple[int, List[Dict[str, Any]]]:
+        (src,) = _write(tmp_path / "src", {"pod.yaml": BAD})
+        items = tmp_path / "items.jsonl"
+        items.write_text(json.dumps({"info": {"violations": []}, "meta": {"source": str(src)}}) + "\n")
+        patches = tmp_path / "patches"
+        patches.mkdir()
+        (patches / "pod.yaml.patch").write_text(patch_text)
+        out = tmp_path / "out.jsonl"
+        kept = builder.make_patch_verified(items, patches, out, rego_dir)
+        return kept, [json.loads(line) for line in out.read_text().splitlines()]
+
+    def test_applied_diff_is_kept(self, tmp_path: Path, stub: StubScanners, rego_dir: Path):
+        """A diff that applies and clears the oracle keeps the patched manifest."""
+        diff = "--- pod.yaml\n+++ pod.yaml\n@@ -4 +4 @@\n-  name: bad\n+  name: fixed\n"
+        kept, items = self._verify(tmp_path, rego_dir, diff)
+        assert kept == 1
+        assert items[0]["question"] == BAD.replace("name: bad", "name: fixed")
+
+    def test_rejected_diff_is_skipped(self, tmp_path: Path, stub: StubScanners, rego_dir: Path):
+        """A diff that does not apply is skipped instead of being written out as the manifest."""
+        diff = "--- pod.yaml\n+++ pod.yaml\n@@ -4 +4 @@\n-  name: other\n+  name: fixed\n"
+        kept, items = self._verify(tmp_path, rego_dir, diff)
+        assert kept == 0
+        assert items == []
+        assert stub.calls[builder.OPA] == 0
+
+    def test_full_content_patch_replaces_manifest(self, tmp_path: Path, stub: StubScanners, rego_dir: Path):
+        """A patch file without diff headers is taken as the fixed manifest."""
+        kept, items = self._verify(tmp_path, rego_dir, GOOD)
+        assert kept == 1
+        assert items[0]["question"] == GOOD
+
+    def test_remaining_oracle_violation_is_rejected(self, tmp_path: Path, stub: StubScanners, rego_dir: Path):
+        """A patch that leaves an OPA violation in place is rejected."""
+        kept, items = self._verify(tmp_path, rego_dir, BAD + "# still bad\n")
+        assert kept == 0
+        assert items == []
+
+    def test_opa_failure_is_rejected(self, tmp_path: Path, stub: StubScanners, rego_dir: Path):
+        """A patched manifest OPA could not evaluate is rejected rather than taken as clean."""
+        stub.fail["opa"].add("pod.yaml")
+        kept, items = self._verify(tmp_path, rego_dir, GOOD)
+        assert stub.calls[builder.OPA] == 1
+        assert kept == 0
+        assert items == []
@@ -11,18 +11,23 @@ import argparse
 import json
 import random
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable, Iterator
 
 
-def _load_jsonl(path: Path) -> list[dict[str, Any]]:
-    items: list[dict[str, Any]] = []
+def _iter_jsonl(path: Path) -> Iterator[dict[str, Any]]:
     with path.open("r", encoding="utf-8") as handle:
         for line in handle:
             line = line.strip()
             if not line:
                 continue
-            items.append(json.loads(line))
-    return items
+            item = json.loads(line)
+            if not isinstance(item, dict):
+                raise SystemExit(f"{path}: expected a JSON object per line, got {type(item).__name__}")
+            # _tag_public_mini writes into meta, so it must be absent or an object
+            meta = item.get("meta", {})
+            if not isinstance(meta, dict):
+                raise SystemExit(f"{path}: expected 'meta' to be a JSON object, got {type(meta).__name__}")
+            yield item
 
 
 def _write_jsonl(path: Path, items: Iterable[dict[str, Any]]) -> None:
@@ -32,6 +37,13 @@ def _write_jsonl(path: Path, items: Iterable[dict[str, Any]]) -> None:
             handle.write(json.dumps(item) + "\n")
 
 
+def _tag_public_mini(items: Iterable[dict[str, Any]], source_for: Callable[[dict[str, Any]], str]) -> None:
+    for item in items:
+        meta = item.setdefault("meta", {})
+        meta["public_mini"] = True
+        meta["source_dataset"] = source_for(meta)
+
+
 def _label_from_answer(answer: Any) -> str | None:
     if isinstance(answer, str):
         return answer
@@ -42,26 +54,51 @@ def _label_from_answer(answer: Any) -> str | None:
     return None
 
 
-def _sample_balanced_e1(items: list[dict[str, Any]], n: int, rng: random.Random) -> list[dict[str, Any]]:
-    benign = [item for item in items if _label_from_answer(item.get("answer")) == "Benign"]
-    malicious = [item for item in items if _label_from_answer(item.get("answer")) == "Malicious"]
-
-    if benign and malicious:
-        target = n // 2
-        rng.shuffle(benign)
-        rng.shuffle(malicious)
-        sampled = benign[:target] + malicious[: target if n % 2 == 0 else target + 1]
-        rng.shuffle(sampled)
-        return sampled[:n]
-
-    rng.shuffle(items)
-    return items[:n]
-
-
-def _sample_e2(items: list[dict[str, Any]], n: int, rng: random.Random) -> list[dict[str, Any]]:
-    items = list(items)
-    rng.shuffle(items)
-    return items[:n]
+def _reservoir_add(
+    reservoir: list[dict[str, Any]], item: dict[str, Any], k: int, seen: int, rng: random.Random
+) -> None:
+    """One step of reservoir sampling (Algorithm R); `seen` counts items offered so far, this one included."""
+    if len(reservoir) < k:
+        reservoir.append(item)
+        return
+    j = rng.randrange(seen)
+    if j < k:
+        reservoir[j] = item
+
+
+def _sample_balanced_e1(items: Iterable[dict[str, Any]], n: int, rng: random.Random) -> list[dict[str, Any]]:
+    """Sample n items, half Benign and half Malicious, in one streaming pass.
+
+    Keeps one reservoir per label plus an unstratified one used when the source
+    lacks either label, so memory is O(n) regardless of source size.
+    """
+    target = n // 2
+    benign: list[dict[str, Any]] = []
+    malicious: list[dict[str, Any]] = []
+    fallback: list[dict[str, Any]] = []
+    n_benign = n_malicious = n_total = 0
+    for item in items:
+        n_total += 1
+        _reservoir_add(fallback, item, n, n_total, rng)
+        label = _label_from_answer(item.get("answer"))
+        if label == "Benign":
+            n_benign += 1
+            _reservoir_add(benign, item, target, n_benign, rng)
+        elif label == "Malicious":
+            n_malicious += 1
+            _reservoir_add(malicious, item, target if n % 2 == 0 else target + 1, n_malicious, rng)
+
+    sampled = benign + malicious if n_benign and n_malicious else fallback
+    rng.shuffle(sampled)
+    return sampled[:n]
+
+
+def _sample_e2(items: Iterable[dict[str, Any]], n: int, rng: random.Random) -> list[dict[str, Any]]:
+    sampled: list[dict[str, Any]] = []
+    for seen, item in enumerate(items, start=1):
+        _reservoir_add(sampled, item, n, seen, rng)
+    rng.shuffle(sampled)
+    return sampled
 
 
 def main() -> None:
@@ -105,27 +142,17 @@ def main() -> None:
     if not args.e2_tf_source.exists():
         raise SystemExit(f"E2 tf source not found: {args.e2_tf_source}")
 
-    e1_items = _load_jsonl(args.e1_source)
-    e1_sample = _sample_balanced_e1(e1_items, args.e1_count, rng)
-    for item in e1_sample:
-        meta = item.get("meta")
-        if isinstance(meta, dict):
-            meta["public_mini"] = True
-            meta["source_dataset"] = args.e1_source.name
-
-    e2_k8s_items = _load_jsonl(args.e2_k8s_source)
-    e2_tf_items = _load_jsonl(args.e2_tf_source)
-    e2_sample = _sample_e2(e2_k8s_items, args.e2_k8s_count, rng) + _sample_e2(
-        e2_tf_items, args.e2_tf_count, rng
+    e1_sample = _sample_balanced_e1(_iter_jsonl(args.e1_source), args.e1_count, rng)
+    _tag_public_mini(e1_sample, lambda meta: args.e1_source.name)
+
+    e2_sample = _sample_e2(_iter_jsonl(args.e2_k8s_source), args.e2_k8s_count, rng) + _sample_e2(
+        _iter_jsonl(args.e2_tf_source), args.e2_tf_count, rng
     )
     rng.shuffle(e2_sample)
-    for item in e2_sample:
-        meta = item.get("meta")
-        if isinstance(meta, dict):
-            meta["public_mini"] = True
-            meta["source_dataset"] = (
-                args.e2_k8s_source.name if meta.get("lang") == "k8s" else args.e2_tf_source.name
-            )
+    _tag_public_mini(
+        e2_sample,
+        lambda meta: args.e2_k8s_source.name if meta.get("lang") == "k8s" else args.e2_tf_source.name,
+    )
 
     outdir = args.outdir
     outdir.mkdir(parents=True, exist_ok=True)
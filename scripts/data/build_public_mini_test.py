@@ -0,0 +1,63 @@
+"""Tests for the streaming samplers in build_public_mini.py."""
+
+import random
+from collections import Counter
+from typing import Any, Dict, List
+
+from build_public_mini import _sample_balanced_e1, _sample_e2
+
+
+def _items(n_benign: int, n_malicious: int) -> List[Dict[str, Any]]:
+    items = [{"answer": "Benign", "meta": {"hash": f"b{i}"}} for i in range(n_benign)]
+    items += [{"answer": "Malicious", "meta": {"hash": f"m{i}"}} for i in range(n_malicious)]
+    random.Random(0).shuffle(items)
+    return items
+
+
+def _labels(items: List[Dict[str, Any]]) -> Counter:
+    return Counter(item["answer"] for item in items)
+
+
+class TestSampleBalancedE1:
+    """Tests for _sample_balanced_e1."""
+
+    def test_even_n_is_balanced(self):
+        """An even n takes n/2 items of each label, without repeats."""
+        sampled = _sample_balanced_e1(_items(300, 50), 20, random.Random(42))
+        assert len(sampled) == 20
+        assert _labels(sampled) == {"Benign": 10, "Malicious": 10}
+        assert len({item["meta"]["hash"] for item in sampled}) == 20
+
+    def test_odd_n_gives_extra_item_to_malicious(self):
+        """An odd n puts the extra item in the Malicious half."""
+        sampled = _sample_balanced_e1(_items(300, 50), 21, random.Random(42))
+        assert _labels(sampled) == {"Benign": 10, "Malicious": 11}
+
+    def test_small_label_is_taken_whole(self):
+        """A label with fewer items than its half contributes all of them."""
+        sampled = _sample_balanced_e1(_items(100, 3), 20, random.Random(42))
+        assert _labels(sampled) == {"Benign": 10, "Malicious": 3}
+
+    def test_fallback_when_a_label_is_missing(self):
+        """Without both labels, n items are sampled from everything seen."""
+        items = _items(30, 0) + [{"answer": {"label": "Suspicious"}, "meta": {"hash": "x"}}]
+        sampled = _sample_balanced_e1(items, 10, random.Random(42))
+        assert len(sampled) == 10
+        assert all(item in items for item in sampled)
+
+    def test_is_deterministic_for_a_seed(self):
+        """The same seed yields the same sample."""
+        items = _items(200, 200)
+        assert _sample_balanced_e1(items, 25, random.Random(7)) == _sample_balanced_e1(
+            items, 25, random.Random(7)
+        )
+
+
+class TestSampleE2:
+    """Tests for _sample_e2."""
+
+    def test_returns_everything_when_n_exceeds_source(self):
+        """Asking for more items than exist returns each item once."""
+        items = [{"meta": {"hash": f"h{i}"}} for i in range(5)]
+        sampled = _sample_e2(items, 10, random.Random(42))
+        assert sorted(item["meta"]["hash"] for item in sampled) == [f"h{i}" for i in range(5)]
@@ -15,9 +15,9 @@ import argparse
 import json
 import os
 import random
-from collections import Counter
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 try:
     from datasets import load_dataset
@@ -26,89 +26,119 @@ except ImportError:
 
 random.seed(42)
 
+REQUIRED_FIELDS = ("question", "answer", "meta")
+REQUIRED_META_FIELDS = ("source", "scenario", "attack_family", "hash", "split")
+VALID_ANSWERS = frozenset({"Malicious", "Benign"})
 
-def load_jsonl(path: Path) -> List[Dict[str, Any]]:
-    """Load JSONL dataset."""
-    items = []
+# Per-check cap on errors kept in reports; totals are still counted exactly
+MAX_REPORTED_ERRORS = 1000
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream a JSONL dataset one item at a time."""
     with path.open() as f:
         for line in f:
             if line.strip():
-                items.append(json.loads(line))
-    return items
-
-
-def validate_schema(items: List[Dict[str, Any]], dataset_name: str) -> Dict[str, Any]:
-    """Validate that all items conform to expected schema."""
-    required_fields = ["question", "answer", "meta"]
-    required_meta_fields = ["source", "scenario", "attack_family", "hash", "split"]
-
-    errors = []
+                yield json.loads(line)
+
+
+def record_error(errors: List[Any], total: int, error: Any) -> int:
+    """Keep `error` unless MAX_REPORTED_ERRORS are already kept; returns the updated total."""
+    if len(errors) < MAX_REPORTED_ERRORS:
+        errors.append(error)
+    return total + 1
+
+
+def validate_items(
+    items: Iterable[Dict[str, Any]], dataset_name: str, n_samples: int = 5
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Check schema, label balance and deduplication in a single pass.
+
+    Returns the three reports, keyed as in the validation results, and the first
+    `n_samples` items for spot-checking against the source dataset. Only
+    counters are kept, so memory grows with unique hashes rather than items.
+    """
+    errors: List[str] = []
+    errors_total = 0
+    labels: Dict[str, int] = {}
+    splits: Dict[str, int] = {}
+    seen_hashes = set()
+    duplicates: Dict[str, int] = {}
+    samples = []
+    total = 0
     for i, item in enumerate(items):
+        total += 1
+        if i < n_samples:
+            samples.append(item)
+
         # Check top-level fields
-        missing = [f for f in required_fields if f not in item]
+        missing = [f for f in REQUIRED_FIELDS if f not in item]
         if missing:
-            errors.append(f"Item {i}: Missing fields {missing}")
+            errors_total = record_error(errors, errors_total, f"Item {i}: Missing fields {missing}")
 
         # Check meta fields
         if "meta" in item:
-            missing_meta = [f for f in required_meta_fields if f not in item["meta"]]
+            meta = item["meta"]
+            missing_meta = [f for f in REQUIRED_META_FIELDS if f not in meta]
             if missing_meta:
-                errors.append(f"Item {i}: Missing meta fields {missing_meta}")
+                errors_total = record_error(
+                    errors, errors_total, f"Item {i}: Missing meta fields {missing_meta}"
+                )
+            if "split" in meta:
+                splits[meta["split"]] = splits.get(meta["split"], 0) + 1
+            if "hash" in meta:
+                h = meta["hash"]
+                if h in seen_hashes:
+                    duplicates[h] = duplicates.get(h, 1) + 1
+                else:
+                    seen_hashes.add(h)
 
         # Check answer is valid
-        if "answer" in item and item["answer"] not in ["Malicious", "Benign"]:
-            errors.append(f"Item {i}: Invalid answer '{item['answer']}'")
-
-    return {
-        "dataset": dataset_name,
-        "total_items": len(items),
-        "errors": errors,
-        "valid": len(errors) == 0,
-    }
-
-
-def analyze_label_distribution(items: List[Dict[str, Any]], dataset_name: str) -> Dict[str, Any]:
-    """Analyze label balance and split distribution."""
-    labels = Counter(item["answer"] for item in items)
-    splits = Counter(item["meta"]["split"] for item in items)
+        if "answer" in item:
+            labels[item["answer"]] = labels.get(item["answer"], 0) + 1
+            if item["answer"] not in VALID_ANSWERS:
+                errors_total = record_error(
+                    errors, errors_total, f"Item {i}: Invalid answer '{item['answer']}'"
+                )
 
     # Calculate balance
-    total = sum(labels.values())
-    malicious_pct = (labels.get("Malicious", 0) / total * 100) if total > 0 else 0
-    benign_pct = (labels.get("Benign", 0) / total * 100) if total > 0 else 0
-
-    # Check if balanced (within ±5% as per DATA_CARD)
-    balance_ok = abs(malicious_pct - 50) <= 5
-
-    return {
-        "dataset": dataset_name,
-        "labels": dict(labels),
-        "label_percentages": {
-            "Malicious": f"{malicious_pct:.1f}%",
-            "Benign": f"{benign_pct:.1f}%",
-        },
-        "balanced": balance_ok,
-        "splits": dict(splits),
-    }
-
-
-def verify_deduplication(items: List[Dict[str, Any]], dataset_name: str) -> Dict[str, Any]:
-    """Check for duplicate hashes (should be none)."""
-    hashes = [item["meta"]["hash"] for item in items]
-    hash_counts = Counter(hashes)
-    duplicates = {h: count for h, count in hash_counts.items() if count > 1}
+    labelled = sum(labels.values())
+    malicious_pct = (labels.get("Malicious", 0) / labelled * 100) if labelled > 0 else 0
+    benign_pct = (labels.get("Benign", 0) / labelled * 100) if labelled > 0 else 0
 
-    return {
-        "dataset": dataset_name,
-        "total_items": len(items),
-        "unique_hashes": len(hash_counts),
-        "duplicates": duplicates,
-        "dedup_effective": len(duplicates) == 0,
+    reports = {
+        "schema_validation": {
+            "dataset": dataset_name,
+            "total_items": total,
+            "errors": errors,
+            "errors_total": errors_total,
+            "errors_truncated": errors_total > len(errors),
+            "valid": errors_total == 0,
+        },
+        "label_distribution": {
+            "dataset": dataset_name,
+            "labels": labels,
+            "label_percentages": {
+                "Malicious": f"{malicious_pct:.1f}%",
+                "Benign": f"{benign_pct:.1f}%",
+            },
+            # Balanced means within ±5% as per DATA_CARD
+            "balanced": abs(malicious_pct - 50) <= 5,
+            "splits": splits,
+        },
+        "deduplication": {
+            "dataset": dataset_name,
+            "total_items": total,
+            "unique_hashes": len(seen_hashes),
+            "duplicates": duplicates,
+            "dedup_effective": len(duplicates) == 0,
+        },
     }
+    return reports, samples
 
 
 def sample_verify_transformations(
-    items: List[Dict[str, Any]],
+    items: Iterable[Dict[str, Any]],
     hf_dataset_id: str,
     dataset_name: str,
     n_samples: int = 5,
@@ -124,7 +154,7 @@ def sample_verify_transformations(
         source_items = list(ds.take(n_samples))
 
         # Take first N items from local dataset
-        local_samples = items[: min(n_samples, len(items))]
+        local_samples = list(islice(items, n_samples))
 
         verification_results = []
         for i, (local, source) in enumerate(zip(local_samples, source_items)):
@@ -177,15 +207,13 @@ def validate_iot23_dataset(data_dir: Path) -> Dict[str, Any]:
     if not dataset_path.exists():
         return {"error": f"Dataset not found: {dataset_path}"}
 
-    items = load_jsonl(dataset_path)
+    reports, samples = validate_items(iter_jsonl(dataset_path), "iot23-train-dev-test-v1")
 
     results = {
         "dataset_file": str(dataset_path),
-        "schema_validation": validate_schema(items, "iot23-train-dev-test-v1"),
-        "label_distribution": analyze_label_distribution(items, "iot23-train-dev-test-v1"),
-        "deduplication": verify_deduplication(items, "iot23-train-dev-test-v1"),
+        **reports,
         "source_verification": sample_verify_transformations(
-            items, "19kmunz/iot-23-preprocessed", "iot23-train-dev-test-v1"
+            samples, "19kmunz/iot-23-preprocessed", "iot23-train-dev-test-v1"
         ),
     }
 
@@ -206,14 +234,12 @@ def validate_ood_datasets(data_dir: Path) -> Dict[str, Any]:
 
     # Validate CIC-IDS-2017
     if cic_path.exists():
-        cic_items = load_jsonl(cic_path)
+        cic_reports, cic_samples = validate_items(iter_jsonl(cic_path), "cic-ids-2017-ood-v1")
         results["cic-ids-2017"] = {
             "dataset_file": str(cic_path),
-            "schema_validation": validate_schema(cic_items, "cic-ids-2017-ood-v1"),
-            "label_distribution": analyze_label_distribution(cic_items, "cic-ids-2017-ood-v1"),
-            "deduplication": verify_deduplication(cic_items, "cic-ids-2017-ood-v1"),
+            **cic_reports,
             "source_verification": sample_verify_transformations(
-                cic_items, "bvk/CICIDS-2017", "cic-ids-2017-ood-v1"
+                cic_samples, "bvk/CICIDS-2017", "cic-ids-2017-ood-v1"
             ),
         }
     else:
@@ -221,14 +247,12 @@ def validate_ood_datasets(data_dir: Path) -> Dict[str, Any]:
 
     # Validate UNSW-NB15
     if unsw_path.exists():
-        unsw_items = load_jsonl(unsw_path)
+        unsw_reports, unsw_samples = validate_items(iter_jsonl(unsw_path), "unsw-nb15-ood-v1")
         results["unsw-nb15"] = {
             "dataset_file": str(unsw_path),
-            "schema_validation": validate_schema(unsw_items, "unsw-nb15-ood-v1"),
-            "label_distribution": analyze_label_distribution(unsw_items, "unsw-nb15-ood-v1"),
-            "deduplication": verify_deduplication(unsw_items, "unsw-nb15-ood-v1"),
+            **unsw_reports,
             "source_verification": sample_verify_transformations(
-                unsw_items, "Mireu-Lab/UNSW-NB15", "unsw-nb15-ood-v1"
+                unsw_samples, "Mireu-Lab/UNSW-NB15", "unsw-nb15-ood-v1"
             ),
         }
     else:
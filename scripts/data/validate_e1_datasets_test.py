@@ -0,0 +1,75 @@
+"""Tests for the single-pass E1 dataset checks in validate_e1_datasets.py."""
+
+from typing import Any, Dict
+
+import pytest
+
+pytest.importorskip("datasets")
+
+from validate_e1_datasets import MAX_REPORTED_ERRORS, validate_items  # noqa: E402
+
+
+def _item(i: int, answer: str = "Benign", split: str = "train", h: str | None = None) -> Dict[str, Any]:
+    return {
+        "question": f"flow {i}",
+        "answer": answer,
+        "meta": {
+            "source": "iot23",
+            "scenario": "s",
+            "attack_family": "none",
+            "hash": h or f"h{i}",
+            "split": split,
+        },
+    }
+
+
+class TestValidateItems:
+    """Tests for validate_items."""
+
+    def test_clean_items(self):
+        """Valid items produce no errors and exact label/split/dedup counts."""
+        items = [_item(0, "Benign"), _item(1, "Malicious", "test"), _item(2, "Malicious", h="h1")]
+        reports, samples = validate_items(items, "e1", n_samples=2)
+
+        schema = reports["schema_validation"]
+        assert schema["valid"] is True
+        assert schema["errors"] == []
+        assert schema["errors_total"] == 0
+        assert schema["errors_truncated"] is False
+
+        labels = reports["label_distribution"]
+        assert labels["labels"] == {"Benign": 1, "Malicious": 2}
+        assert labels["splits"] == {"train": 2, "test": 1}
+
+        dedup = reports["deduplication"]
+        assert dedup["unique_hashes"] == 2
+        assert dedup["duplicates"] == {"h1": 2}
+        assert dedup["dedup_effective"] is False
+
+        assert samples == items[:2]
+
+    def test_errors_are_capped_but_counted(self):
+        """More than MAX_REPORTED_ERRORS bad rows keep the first ones and count them all."""
+        n_bad = MAX_REPORTED_ERRORS + 5
+        items = [_item(i, "Unknown") for i in range(n_bad)]
+        reports, _ = validate_items(items, "e1")
+
+        schema = reports["schema_validation"]
+        assert schema["total_items"] == n_bad
+        assert len(schema["errors"]) == MAX_REPORTED_ERRORS
+        assert schema["errors"][0] == "Item 0: Invalid answer 'Unknown'"
+        assert schema["errors"][-1] == f"Item {MAX_REPORTED_ERRORS - 1}: Invalid answer 'Unknown'"
+        assert schema["errors_total"] == n_bad
+        assert schema["errors_truncated"] is True
+        assert schema["valid"] is False
+
+    def test_valid_follows_total_not_kept_list(self):
+        """A single error keeps valid False even though nothing is truncated."""
+        items = [_item(0), {"question": "q", "answer": "Benign"}]
+        reports, _ = validate_items(items, "e1")
+
+        schema = reports["schema_validation"]
+        assert schema["errors"] == ["Item 1: Missing fields ['meta']"]
+        assert schema["errors_total"] == 1
+        assert schema["errors_truncated"] is False
+        assert schema["valid"] is False
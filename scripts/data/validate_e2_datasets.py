@@ -14,100 +14,191 @@ Checks:
 import argparse
 import hashlib
 import json
+import os
 import subprocess
-from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
+REQUIRED_FIELDS = ("prompt", "info", "meta")
+REQUIRED_INFO_FIELDS = ("violations", "patch")
+REQUIRED_META_FIELDS = ("lang", "source", "hash")
+REQUIRED_VIOLATION_FIELDS = ("tool", "rule_id", "severity", "msg", "loc")
+VALID_LANGS = frozenset({"k8s", "tf"})
 
-def load_jsonl(path: Path) -> List[Dict[str, Any]]:
-    """Load JSONL dataset."""
-    items = []
+# Per-check cap on errors kept in reports; totals are still counted exactly
+MAX_REPORTED_ERRORS = 1000
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream a JSONL dataset one item at a time."""
     with path.open() as f:
         for line in f:
             if line.strip():
-                items.append(json.loads(line))
-    return items
-
-
-def validate_schema(items: List[Dict[str, Any]], dataset_name: str) -> Dict[str, Any]:
-    """Validate that all items conform to E2 schema."""
-    required_fields = ["prompt", "info", "meta"]
-    required_info_fields = ["violations", "patch"]
-    required_meta_fields = ["lang", "source", "hash"]
-    required_violation_fields = ["tool", "rule_id", "severity", "msg", "loc"]
+                yield json.loads(line)
+
+
+def record_error(errors: List[Any], total: int, error: Any) -> int:
+    """Keep `error` unless MAX_REPORTED_ERRORS are already kept; returns the updated total."""
+    if len(errors) < MAX_REPORTED_ERRORS:
+        errors.append(error)
+    return total + 1
+
+
+def validate_items(
+    items: Iterable[Dict[str, Any]], dataset_name: str
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Check schema, violations and prompt content in a single pass.
+
+    Returns the three reports, keyed as in the validation results, and each
+    item's meta (in item order) for source verification, so prompts are never
+    held in memory beyond the item being checked.
+    """
+    schema_errors: List[str] = []
+    prompt_errors: List[Dict[str, Any]] = []
+    schema_total = prompt_total = 0
+    metas = []
+    total = 0
+    total_violations = 0
+    by_tool: Dict[str, int] = {}
+    by_severity: Dict[str, int] = {}
+    items_with_violations = 0
 
-    errors = []
     for i, item in enumerate(items):
+        total += 1
+        metas.append(item.get("meta"))
+
         # Check top-level fields
-        missing = [f for f in required_fields if f not in item]
+        missing = [f for f in REQUIRED_FIELDS if f not in item]
         if missing:
-            errors.append(f"Item {i}: Missing fields {missing}")
+            schema_total = record_error(schema_errors, schema_total, f"Item {i}: Missing fields {missing}")
 
         # Check info fields
         if "info" in item:
-            missing_info = [f for f in required_info_fields if f not in item["info"]]
+            missing_info = [f for f in REQUIRED_INFO_FIELDS if f not in item["info"]]
             if missing_info:
-                errors.append(f"Item {i}: Missing info fields {missing_info}")
+                schema_total = record_error(
+                    schema_errors, schema_total, f"Item {i}: Missing info fields {missing_info}"
+                )
 
             # Check violations structure
             if "violations" in item["info"] and isinstance(item["info"]["violations"], list):
                 for j, v in enumerate(item["info"]["violations"]):
-                    missing_v = [f for f in required_violation_fields if f not in v]
+                    missing_v = [f for f in REQUIRED_VIOLATION_FIELDS if f not in v]
                     if missing_v:
-                        errors.append(f"Item {i}, violation {j}: Missing fields {missing_v}")
+                        schema_total = record_error(
+                            schema_errors,
+                            schema_total,
+                            f"Item {i}, violation {j}: Missing fields {missing_v}",
+                        )
 
         # Check meta fields
         if "meta" in item:
-            missing_meta = [f for f in required_meta_fields if f not in item["meta"]]
+            missing_meta = [f for f in REQUIRED_META_FIELDS if f not in item["meta"]]
             if missing_meta:
-                errors.append(f"Item {i}: Missing meta fields {missing_meta}")
+                schema_total = record_error(
+                    schema_errors, schema_total, f"Item {i}: Missing meta fields {missing_meta}"
+                )
 
             # Check lang is valid
-            if "lang" in item["meta"] and item["meta"]["lang"] not in ["k8s", "tf"]:
-                errors.append(f"Item {i}: Invalid lang '{item['meta']['lang']}'")
+            if "lang" in item["meta"] and item["meta"]["lang"] not in VALID_LANGS:
+                schema_total = record_error(
+                    schema_errors, schema_total, f"Item {i}: Invalid lang '{item['meta']['lang']}'"
+                )
 
-    return {
-        "dataset": dataset_name,
-        "total_items": len(items),
-        "errors": errors,
-        "valid": len(errors) == 0,
-    }
-
-
-def analyze_violations(items: List[Dict[str, Any]], dataset_name: str) -> Dict[str, Any]:
-    """Analyze violation patterns and tool coverage."""
-    total_violations = 0
-    by_tool = Counter()
-    by_severity = Counter()
-    items_with_violations = 0
-
-    for item in items:
+        # Violation patterns and tool coverage
         violations = item.get("info", {}).get("violations", [])
         if violations:
             items_with_violations += 1
             total_violations += len(violations)
 
         for v in violations:
-            by_tool[v.get("tool", "unknown")] += 1
-            by_severity[v.get("severity", "unknown")] += 1
-
-    return {
-        "dataset": dataset_name,
-        "total_items": len(items),
-        "items_with_violations": items_with_violations,
-        "items_without_violations": len(items) - items_with_violations,
-        "total_violations": total_violations,
-        "avg_violations_per_item": total_violations / len(items) if items else 0,
-        "violations_by_tool": dict(by_tool),
-        "violations_by_severity": dict(by_severity),
+            tool = v.get("tool", "unknown")
+            severity = v.get("severity", "unknown")
+            by_tool[tool] = by_tool.get(tool, 0) + 1
+            by_severity[severity] = by_severity.get(severity, 0) + 1
+
+        # Prompt should contain actual file content
+        prompt_error = check_prompt(item.get("prompt", ""), item.get("meta", {}).get("lang", ""))
+        if prompt_error:
+            prompt_total = record_error(prompt_errors, prompt_total, {"index": i, "error": prompt_error})
+
+    reports = {
+        "schema_validation": {
+            "dataset": dataset_name,
+            "total_items": total,
+            "errors": schema_errors,
+            "errors_total": schema_total,
+            "errors_truncated": schema_total > len(schema_errors),
+            "valid": schema_total == 0,
+        },
+        "violations_analysis": {
+            "dataset": dataset_name,
+            "total_items": total,
+            "items_with_violations": items_with_violations,
+            "items_without_violations": total - items_with_violations,
+            "total_violations": total_violations,
+            "avg_violations_per_item": total_violations / total if total else 0,
+            "violations_by_tool": by_tool,
+            "violations_by_severity": by_severity,
+        },
+        "prompt_validation": {
+            "dataset": dataset_name,
+            "total_items": total,
+            "errors": prompt_errors,
+            "errors_total": prompt_total,
+            "errors_truncated": prompt_total > len(prompt_errors),
+            "valid_prompts": total - prompt_total,
+        },
     }
+    return reports, metas
+
+
+def check_prompt(prompt: str, lang: str) -> str | None:
+    """Return why a prompt doesn't look like the file content for `lang`, if it doesn't."""
+    # Basic sanity checks
+    if not prompt or len(prompt.strip()) == 0:
+        return "Empty prompt"
+
+    # Check for expected content markers (chained `in` tests stop at the first hit)
+    if lang == "k8s":
+        # Should contain YAML-like content
+        if not ("apiVersion:" in prompt or "kind:" in prompt or "metadata:" in prompt or "spec:" in prompt):
+            return "Prompt doesn't look like K8s YAML"
+
+    elif lang == "tf":
+        # Should contain Terraform HCL
+        if not (
+            "resource " in prompt or "variable " in prompt or "output " in prompt or "provider " in prompt
+        ):
+            return "Prompt doesn't look like Terraform HCL"
+
+    return None
+
+
+def hash_source_file(path: Path) -> str:
+    """Short hash of a source file's text, matching meta.hash from the builder.
+
+    meta.hash covers the decoded text with universal newlines (as read_text()
+    returns it), not the raw bytes, so the file is read once and decoded the same way.
+    The decoding mirrors decode_text in build_e2_k8s_tf.py; keep the two in sync.
+    """
+    data = path.read_bytes()
+    try:
+        content = data.decode("utf-8")
+    except UnicodeDecodeError:
+        content = data.decode("utf-8", errors="ignore")
+    content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
 
 
 def verify_source_files(
-    items: List[Dict[str, Any]], dataset_name: str, source_root: Path = None
+    metas: List[Dict[str, Any]], dataset_name: str, source_root: Path = None, jobs: int = 1
 ) -> Dict[str, Any]:
-    """Verify that source files exist and hashes match."""
+    """Verify that source files exist and hashes match, given each item's meta.
+
+    Files are hashed by up to `jobs` threads; the work is mostly file reads.
+    """
     if not source_root or not source_root.exists():
         return {
             "dataset": dataset_name,
@@ -116,9 +207,11 @@ def verify_source_files(
 
     missing_files = []
     hash_mismatches = []
+    resolved: List[Tuple[int, Path, Path]] = []
+    by_name: Dict[str, List[Path]] | None = None
 
-    for i, item in enumerate(items):
-        source_path = Path(item["meta"]["source"])
+    for i, meta in enumerate(metas):
+        source_path = Path(meta["source"])
 
         # Try to resolve source path
         if source_path.is_absolute() and source_path.exists():
@@ -127,8 +220,12 @@ def verify_source_files(
             # Try relative to source root
             file_path = source_root / source_path.name
             if not file_path.exists():
-                # Try finding in subdirs
-                matches = list(source_root.rglob(source_path.name))
+                # Try finding in subdirs; the tree is walked once and indexed by name
+                if by_name is None:
+                    by_name = {}
+                    for p in source_root.rglob("*"):
+                        by_name.setdefault(p.name, []).append(p)
+                matches = by_name.get(source_path.name)
                 file_path = matches[0] if matches else None
         else:
             file_path = None
@@ -136,15 +233,16 @@ def verify_source_files(
         if not file_path or not Path(file_path).exists():
             missing_files.append({"index": i, "source": str(source_path)})
             continue
+        resolved.append((i, source_path, file_path))
 
-        # Verify hash
-        try:
-            content = Path(file_path).read_text(encoding="utf-8")
-        except Exception:
-            content = Path(file_path).read_text(errors="ignore")
+    # Several items can resolve to the same file, which is hashed once
+    unique_paths = list(dict.fromkeys(file_path for _, _, file_path in resolved))
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        hashes = dict(zip(unique_paths, pool.map(hash_source_file, unique_paths)))
 
-        computed_hash = hashlib.sha256(content.encode()).hexdigest()[:16]
-        expected_hash = item["meta"]["hash"]
+    for i, source_path, file_path in resolved:
+        computed_hash = hashes[file_path]
+        expected_hash = metas[i]["hash"]
 
         if computed_hash != expected_hash:
             hash_mismatches.append(
@@ -158,49 +256,35 @@ def verify_source_files(
 
     return {
         "dataset": dataset_name,
-        "total_items": len(items),
+        "total_items": len(metas),
         "missing_files": missing_files,
         "hash_mismatches": hash_mismatches,
-        "files_verified": len(items) - len(missing_files) - len(hash_mismatches),
+        "files_verified": len(metas) - len(missing_files) - len(hash_mismatches),
     }
 
 
-def verify_prompt_content(items: List[Dict[str, Any]], dataset_name: str) -> Dict[str, Any]:
-    """Verify that prompt field contains actual file content."""
-    errors = []
+# Command per tool and the stdout line holding its version (semgrep may print warnings first)
+VERSION_COMMANDS = {
+    "kube-linter": (["kube-linter", "version"], 0),
+    "semgrep": (["semgrep", "--version"], -1),
+    "opa": (["opa", "version"], 0),
+}
 
-    for i, item in enumerate(items):
-        prompt = item.get("prompt", "")
-        lang = item.get("meta", {}).get("lang", "")
 
-        # Basic sanity checks
-        if not prompt or len(prompt.strip()) == 0:
-            errors.append({"index": i, "error": "Empty prompt"})
-            continue
-
-        # Check for expected content markers
-        if lang == "k8s":
-            # Should contain YAML-like content
-            has_yaml_markers = any(
-                marker in prompt for marker in ["apiVersion:", "kind:", "metadata:", "spec:"]
-            )
-            if not has_yaml_markers:
-                errors.append({"index": i, "error": "Prompt doesn't look like K8s YAML"})
-
-        elif lang == "tf":
-            # Should contain Terraform HCL
-            has_tf_markers = any(
-                marker in prompt for marker in ["resource ", "variable ", "output ", "provider "]
-            )
-            if not has_tf_markers:
-                errors.append({"index": i, "error": "Prompt doesn't look like Terraform HCL"})
-
-    return {
-        "dataset": dataset_name,
-        "total_items": len(items),
-        "errors": errors,
-        "valid_prompts": len(items) - len(errors),
-    }
+def get_tool_version(cmd: List[str], line: int) -> str | None:
+    """Return the tool's version line, an error string, or None on a non-zero exit."""
+    try:
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except Exception as e:
+        return f"error: {e}"
+    if result.returncode == 0:
+        return result.stdout.strip().split("\n")[line]
+    return None
 
 
 def check_tool_versions(data_dir: Path) -> Dict[str, Any]:
@@ -212,44 +296,13 @@ def check_tool_versions(data_dir: Path) -> Dict[str, Any]:
 
     versions = json.loads(versions_file.read_text())
 
-    # Try to get current tool versions
+    # Try to get current tool versions; the tools start up concurrently
     current_versions = {}
-
-    try:
-        result = subprocess.run(
-            ["kube-linter", "version"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if result.returncode == 0:
-            current_versions["kube-linter"] = result.stdout.strip().split("\n")[0]
-    except Exception as e:
-        current_versions["kube-linter"] = f"error: {e}"
-
-    try:
-        result = subprocess.run(
-            ["semgrep", "--version"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if result.returncode == 0:
-            current_versions["semgrep"] = result.stdout.strip().split("\n")[-1]
-    except Exception as e:
-        current_versions["semgrep"] = f"error: {e}"
-
-    try:
-        result = subprocess.run(
-            ["opa", "version"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if result.returncode == 0:
-            current_versions["opa"] = result.stdout.strip().split("\n")[0]
-    except Exception as e:
-        current_versions["opa"] = f"error: {e}"
+    with ThreadPoolExecutor(max_workers=len(VERSION_COMMANDS)) as pool:
+        results = pool.map(lambda item: get_tool_version(*item), VERSION_COMMANDS.values())
+        for name, version in zip(VERSION_COMMANDS, results):
+            if version is not None:
+                current_versions[name] = version
 
     return {
         "recorded_versions": versions,
@@ -258,41 +311,37 @@ def check_tool_versions(data_dir: Path) -> Dict[str, Any]:
     }
 
 
-def validate_k8s_dataset(data_dir: Path, source_root: Path = None) -> Dict[str, Any]:
+def validate_k8s_dataset(data_dir: Path, source_root: Path = None, jobs: int = 1) -> Dict[str, Any]:
     """Validate K8s dataset."""
     dataset_path = data_dir / "k8s-labeled-v1.jsonl"
 
     if not dataset_path.exists():
         return {"error": f"Dataset not found: {dataset_path}"}
 
-    items = load_jsonl(dataset_path)
+    reports, metas = validate_items(iter_jsonl(dataset_path), "k8s-labeled-v1")
 
     results = {
         "dataset_file": str(dataset_path),
-        "schema_validation": validate_schema(items, "k8s-labeled-v1"),
-        "violations_analysis": analyze_violations(items, "k8s-labeled-v1"),
-        "prompt_validation": verify_prompt_content(items, "k8s-labeled-v1"),
-        "source_verification": verify_source_files(items, "k8s-labeled-v1", source_root),
+        **reports,
+        "source_verification": verify_source_files(metas, "k8s-labeled-v1", source_root, jobs=jobs),
     }
 
     return results
 
 
-def validate_terraform_dataset(data_dir: Path, source_root: Path = None) -> Dict[str, Any]:
+def validate_terraform_dataset(data_dir: Path, source_root: Path = None, jobs: int = 1) -> Dict[str, Any]:
     """Validate Terraform dataset."""
     dataset_path = data_dir / "terraform-labeled-v1.jsonl"
 
     if not dataset_path.exists():
         return {"error": f"Dataset not found: {dataset_path}"}
 
-    items = load_jsonl(dataset_path)
+    reports, metas = validate_items(iter_jsonl(dataset_path), "terraform-labeled-v1")
 
     results = {
         "dataset_file": str(dataset_path),
-        "schema_validation": validate_schema(items, "terraform-labeled-v1"),
-        "violations_analysis": analyze_violations(items, "terraform-labeled-v1"),
-        "prompt_validation": verify_prompt_content(items, "terraform-labeled-v1"),
-        "source_verification": verify_source_files(items, "terraform-labeled-v1", source_root),
+        **reports,
+        "source_verification": verify_source_files(metas, "terraform-labeled-v1", source_root, jobs=jobs),
     }
 
     return results
@@ -330,6 +379,12 @@ def main():
         default="all",
         help="Which datasets to validate",
     )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of source files to hash concurrently (default: CPU count)",
+    )
     ap.add_argument(
         "--output",
         type=Path,
@@ -352,12 +407,12 @@ def main():
         print_summary(metadata, "Dataset Metadata")
 
     if args.datasets in ["k8s", "all"]:
-        k8s_results = validate_k8s_dataset(args.data_dir, args.k8s_source_root)
+        k8s_results = validate_k8s_dataset(args.data_dir, args.k8s_source_root, jobs=args.jobs)
         validation_report["k8s"] = k8s_results
         print_summary(k8s_results, "K8s Dataset Validation")
 
     if args.datasets in ["terraform", "all"]:
-        tf_results = validate_terraform_dataset(args.data_dir, args.tf_source_root)
+        tf_results = validate_terraform_dataset(args.data_dir, args.tf_source_root, jobs=args.jobs)
         validation_report["terraform"] = tf_results
         print_summary(tf_results, "Terraform Dataset Validation")
 
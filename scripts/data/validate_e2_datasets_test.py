@@ -0,0 +1,69 @@
+"""Tests for the single-pass E2 dataset checks in validate_e2_datasets.py."""
+
+from typing import Any, Dict, List
+
+from validate_e2_datasets import MAX_REPORTED_ERRORS, validate_items
+
+K8S_PROMPT = "apiVersion: v1\nkind: Pod\nmetadata:\n  name: web\n"
+
+
+def _item(i: int, prompt: str = K8S_PROMPT, violations: List[Dict[str, Any]] | None = None) -> Dict[str, Any]:
+    return {
+        "prompt": prompt,
+        "info": {"violations": violations or [], "patch": None},
+        "meta": {"lang": "k8s", "source": f"pod-{i}.yaml", "hash": f"h{i}"},
+    }
+
+
+class TestValidateItems:
+    """Tests for validate_items."""
+
+    def test_clean_items(self):
+        """Valid items produce no errors, violation counts and one meta per item."""
+        violation = {"tool": "kube-linter", "rule_id": "r", "severity": "high", "msg": "m", "loc": "l"}
+        items = [_item(0, violations=[violation, violation]), _item(1)]
+        reports, metas = validate_items(items, "k8s")
+
+        schema = reports["schema_validation"]
+        assert schema["valid"] is True
+        assert schema["errors_total"] == 0
+        assert schema["errors_truncated"] is False
+
+        analysis = reports["violations_analysis"]
+        assert analysis["items_with_violations"] == 1
+        assert analysis["items_without_violations"] == 1
+        assert analysis["total_violations"] == 2
+        assert analysis["violations_by_tool"] == {"kube-linter": 2}
+        assert analysis["violations_by_severity"] == {"high": 2}
+
+        assert reports["prompt_validation"]["valid_prompts"] == 2
+        assert metas == [item["meta"] for item in items]
+
+    def test_schema_errors_are_capped_but_counted(self):
+        """More than MAX_REPORTED_ERRORS schema errors keep the first ones and count them all."""
+        n_bad = MAX_REPORTED_ERRORS + 5
+        items = [_item(i) for i in range(n_bad)]
+        for item in items:
+            item["meta"]["lang"] = "yaml"
+        reports, _ = validate_items(items, "k8s")
+
+        schema = reports["schema_validation"]
+        assert schema["total_items"] == n_bad
+        assert len(schema["errors"]) == MAX_REPORTED_ERRORS
+        assert schema["errors"][0] == "Item 0: Invalid lang 'yaml'"
+        assert schema["errors_total"] == n_bad
+        assert schema["errors_truncated"] is True
+        assert schema["valid"] is False
+
+    def test_prompt_errors_are_capped_but_counted(self):
+        """Prompt errors are capped the same way and valid_prompts uses the exact total."""
+        n_bad = MAX_REPORTED_ERRORS + 5
+        items = [_item(i, prompt="") for i in range(n_bad)] + [_item(n_bad)]
+        reports, _ = validate_items(items, "k8s")
+
+        prompts = reports["prompt_validation"]
+        assert len(prompts["errors"]) == MAX_REPORTED_ERRORS
+        assert prompts["errors"][0] == {"index": 0, "error": "Empty prompt"}
+        assert prompts["errors_total"] == n_bad
+        assert prompts["errors_truncated"] is True
+        assert prompts["valid_prompts"] == 1
@@ -26,9 +26,9 @@ import argparse
 import json
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import BaseModel, Field, ValidationError, field_validator
+from pydantic import BaseModel, Field, ValidationError
 
 
 class Violation(BaseModel):
@@ -51,19 +51,10 @@ class InfoE2(BaseModel):
 class MetaE2(BaseModel):
     """Metadata for E2 config verification samples."""
 
-    lang: str = Field(..., description="Config language (k8s or tf)")
+    lang: Literal["k8s", "tf"] = Field(..., description="Config language (k8s or tf)")
     source: str = Field(..., description="Source repository")
     hash: str = Field(..., description="SHA256 hash (short form)")
 
-    @field_validator("lang")
-    @classmethod
-    def validate_lang(cls, v: str) -> str:
-        """Validate lang is k8s or tf."""
-        allowed = {"k8s", "tf"}
-        if v not in allowed:
-            raise ValueError(f"lang must be one of {allowed}, got: {v}")
-        return v
-
 
 class RowE2(BaseModel):
     """E2 canonical row schema."""
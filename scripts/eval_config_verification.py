@@ -19,14 +19,18 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import inspect
 import json
 import os
 import sys
 import tempfile
 import time
 import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Deque, Dict, List, Optional, Tuple, cast
 
 # Ensure local repo modules are importable
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -96,8 +100,6 @@ def convert_tools_to_openai_format(tools: List) -> List[Dict[str, Any]]:
     openai_tools = []
     for tool in tools:
         # Extract function signature and docstring
-        import inspect
-
         sig = inspect.signature(tool)
         params = {}
         required = []
@@ -136,10 +138,16 @@ async def run_multiturn_evaluation(
     max_tokens: Optional[int] = None,
     fixture_path: Optional[str] = None,
     system_prompt_override: Optional[str] = None,
+    openai_tools: Optional[List[Dict[str, Any]]] = None,
+    tool_map: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """
     Run a multi-turn evaluation with tool calling support.
 
+    ``openai_tools`` lets callers pass schemas already built with
+    :func:`convert_tools_to_openai_format`, and ``tool_map`` a name-to-callable
+    index of the same tools; both are derived from ``env.tools`` when omitted.
+
     Returns a dictionary with the completion and any tool interactions.
     """
     # Prefer an on-disk fixture (persisted in the run directory) if provided.
@@ -164,15 +172,23 @@ async def run_multiturn_evaluation(
 
     messages = [{"role": "system", "content": enhanced_prompt}, {"role": "user", "content": question}]
 
-    # Convert tools to OpenAI format if available
-    openai_tools = []
-    if hasattr(env, "tools") and env.tools:
-        openai_tools = convert_tools_to_openai_format(env.tools)
+    # Convert tools to OpenAI format if the caller did not supply them
+    if openai_tools is None:
+        openai_tools = []
+        if hasattr(env, "tools") and env.tools:
+            openai_tools = convert_tools_to_openai_format(env.tools)
+    if tool_map is None:
+        tool_map = {tool.__name__: tool for tool in getattr(env, "tools", None) or []}
 
     # Track tool calls for debugging
     tool_interactions = []
     final_completion = ""
 
+    # GPT-5 and o1 series models have restricted parameter support
+    # - temperature: not supported (only default: 1)
+    # - max_tokens: not supported, use max_completion_tokens instead
+    is_reasoning_model = model.startswith(("gpt-5", "o1-", "o3-"))
+
     for turn in range(max_turns):
         try:
             # Build kwargs for API call
@@ -186,11 +202,6 @@ async def run_multiturn_evaluation(
                 kwargs["tools"] = openai_tools
                 kwargs["tool_choice"] = "auto"
 
-            # GPT-5 and o1 series models have restricted parameter support
-            # - temperature: not supported (only default: 1)
-            # - max_tokens: not supported, use max_completion_tokens instead
-            is_reasoning_model = model.startswith(("gpt-5", "o1-", "o3-"))
-
             # Add temperature only for non-reasoning models
             if temperature is not None and not is_reasoning_model:
                 kwargs["temperature"] = temperature
@@ -226,24 +237,23 @@ async def run_multiturn_evaluation(
                     # Find and call the actual tool
                     tool_result = None
                     start_time = time.perf_counter()
-                    for tool in env.tools:
-                        if tool.__name__ == function_name:
-                            try:
-                                # Call the tool with the provided arguments
-                                if "paths" in function_args:
-                                    # Use the fixture path or temp path if provided
-                                    paths = function_args["paths"]
-                                    if not any(Path(p).exists() for p in paths):
-                                        if temp_path:
-                                            paths = [temp_path]
-                                        elif fixture_path:
-                                            paths = [fixture_path]
-                                    tool_result = tool(paths)
-                                else:
-                                    tool_result = tool(**function_args)
-                            except Exception as e:
-                                tool_result = f"Error calling tool: {str(e)}"
-                            break
+                    tool = tool_map.get(function_name)
+                    if tool is not None:
+                        try:
+                            # Call the tool with the provided arguments
+                            if "paths" in function_args:
+                                # Use the fixture path or temp path if provided
+                                paths = function_args["paths"]
+                                if not any(Path(p).exists() for p in paths):
+                                    if temp_path:
+                                        paths = [temp_path]
+                                    elif fixture_path:
+                                        paths = [fixture_path]
+                                tool_result = tool(paths)
+                            else:
+                                tool_result = tool(**function_args)
+                        except Exception as e:
+                            tool_result = f"Error calling tool: {str(e)}"
 
                     if tool_result is None:
                         tool_result = f"Tool {function_name} not found"
@@ -344,6 +354,13 @@ def main() -> None:
         help="Stop evaluation after this many consecutive errors (default: 3). "
         "Set to 0 to disable early stopping.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of examples evaluated in parallel (default: 1). "
+        "Results are still written in dataset order; on early stop, examples already in flight finish.",
+    )
     parser.add_argument(
         "--seed",
         type=int,
@@ -392,9 +409,13 @@ def main() -> None:
 
     format_reward = env.parser.get_format_reward_func()  # type: ignore[attr-defined]
 
-    # Report available tools
+    # Report available tools and build their OpenAI schemas once for the run
+    openai_tools: List[Dict[str, Any]] = []
+    tool_map: Dict[str, Any] = {}
     if hasattr(env, "tools") and env.tools:
         print(f"Available tools: {[t.__name__ for t in env.tools]}")
+        openai_tools = convert_tools_to_openai_format(env.tools)
+        tool_map = {tool.__name__: tool for tool in env.tools}
     else:
         print("Warning: No tools available in environment")
 
@@ -468,71 +489,121 @@ def main() -> None:
                 max_consecutive_errors=args.max_consecutive_errors, window_size=window_size
             )
 
-        with results_path.open("w", encoding="utf-8") as f:
-            for i, sample in enumerate(dataset):
-                print(f"  Example {i + 1}/{len(dataset)}...")
-                question = str(sample.get("question", ""))
-                answer = sample.get("answer")  # may be string (JSON) or dict
+        def evaluate_example(i: int, sample: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+            """Run one example end to end; returns its record and the raw evaluation result."""
+            question = str(sample.get("question", ""))
+            answer = sample.get("answer")  # may be string (JSON) or dict
 
-                record: Dict[str, Any] = {
-                    "index": i,
-                    "prompt": question,
-                    "answer": answer,
-                }
+            record: Dict[str, Any] = {
+                "index": i,
+                "prompt": question,
+                "answer": answer,
+            }
 
-                # Get fixture path if available
-                fixture_path = None
-                fixture_type = None
-                if isinstance(answer, str):
-                    try:
-                        answer_obj = json.loads(answer)
-                        fixture_path = answer_obj.get("fixture_path")
-                        fixture_type = answer_obj.get("fixture_type")
-                    except json.JSONDecodeError:
-                        pass
-                elif isinstance(answer, dict):
-                    fixture_path = answer.get("fixture_path")
-                    fixture_type = answer.get("fixture_type")
-
-                normalized_fixture_type = _normalize_fixture_type(fixture_type, question)
-
-                resolved_fixture_path: Optional[str] = None
-                if fixture_path:
-                    candidate = Path(str(fixture_path))
-                    if not candidate.is_absolute():
-                        candidate = (REPO_ROOT / candidate).resolve()
-                    if candidate.exists():
-                        resolved_fixture_path = str(candidate)
-
-                if resolved_fixture_path is None:
-                    resolved_fixture_path = _persist_fixture(run_dir, i, question, normalized_fixture_type)
-
-                record["fixture_path"] = resolved_fixture_path
-                record["fixture_type"] = normalized_fixture_type
-
-                # Run multi-turn evaluation
+            # Get fixture path if available
+            fixture_path = None
+            fixture_type = None
+            if isinstance(answer, str):
                 try:
-                    result = asyncio.run(
-                        run_multiturn_evaluation(
-                            client,
-                            env,
-                            effective_model,  # Use the effective model name (mapped for OpenRouter)
-                            question,
-                            answer,
-                            max_turns=args.max_turns,
-                            temperature=args.temperature,
-                            max_tokens=args.max_tokens,
-                            fixture_path=resolved_fixture_path,
-                            system_prompt_override=system_prompt_override,
-                        )
-                    )
+                    answer_obj = json.loads(answer)
+                    fixture_path = answer_obj.get("fixture_path")
+                    fixture_type = answer_obj.get("fixture_type")
+                except json.JSONDecodeError:
+                    pass
+            elif isinstance(answer, dict):
+                fixture_path = answer.get("fixture_path")
+                fixture_type = answer.get("fixture_type")
+
+            normalized_fixture_type = _normalize_fixture_type(fixture_type, question)
+
+            resolved_fixture_path: Optional[str] = None
+            if fixture_path:
+                candidate = Path(str(fixture_path))
+                if not candidate.is_absolute():
+                    candidate = (REPO_ROOT / candidate).resolve()
+                if candidate.exists():
+                    resolved_fixture_path = str(candidate)
+
+            if resolved_fixture_path is None:
+                resolved_fixture_path = _persist_fixture(run_dir, i, question, normalized_fixture_type)
+
+            record["fixture_path"] = resolved_fixture_path
+            record["fixture_type"] = normalized_fixture_type
+
+            # Run multi-turn evaluation (each worker thread gets its own event loop)
+            result = asyncio.run(
+                run_multiturn_evaluation(
+                    client,
+                    env,
+                    effective_model,  # Use the effective model name (mapped for OpenRouter)
+                    question,
+                    answer,
+                    max_turns=args.max_turns,
+                    temperature=args.temperature,
+                    max_tokens=args.max_tokens,
+                    fixture_path=resolved_fixture_path,
+                    system_prompt_override=system_prompt_override,
+                    openai_tools=openai_tools,
+                    tool_map=tool_map,
+                )
+            )
 
-                    record["completion"] = result["completion"]
-                    record["tool_interactions"] = result.get("tool_interactions", [])
-                    record["turns_used"] = result.get("turns_used", 0)
+            record["completion"] = result["completion"]
+            record["tool_interactions"] = result.get("tool_interactions", [])
+            record["turns_used"] = result.get("turns_used", 0)
+            if "error" in result:
+                record["completion_error"] = result["error"]
+
+            # Compute rewards
+            text = result["completion"]
+            try:
+                r_main = float(
+                    reward_config_auditing(
+                        text,
+                        answer,
+                        fixture_path=resolved_fixture_path,
+                        fixture_type=normalized_fixture_type,
+                    )
+                )
+            except Exception as e:
+                r_main = 0.0
+                record["reward_error"] = str(e)
+            try:
+                r_format = float(format_reward(text, answer=answer))
+            except Exception:
+                r_format = 0.0
+
+            record["rewards"] = {
+                "reward_config_auditing": r_main,
+                "format_reward": r_format,
+            }
+            return record, result
+
+        # At most `concurrency` examples are in flight. Results are consumed (and
+        # early stopping is applied) in dataset order so results.jsonl stays
+        # ordered, and the next example is only submitted once a result has been
+        # consumed; with --concurrency 1 this runs exactly like a serial loop.
+        concurrency = max(1, args.concurrency)
+        examples = enumerate(dataset)
+        in_flight: Deque[Future] = deque()
+
+        def submit_next() -> None:
+            for i, sample in islice(examples, 1):
+                print(f"  Example {i + 1}/{len(dataset)}...")
+                in_flight.append(executor.submit(evaluate_example, i, sample))
+
+        with (
+            results_path.open("w", encoding="utf-8") as f,
+            ThreadPoolExecutor(max_workers=concurrency) as executor,
+        ):
+            for _ in range(concurrency):
+                submit_next()
+            while in_flight:
+                record, result = in_flight.popleft().result()
+                i = record["index"]
 
+                try:
                     if "error" in result:
-                        record["completion_error"] = result["error"]
                         # Track the error for early stopping
                         if error_tracker:
                             error_tracker.record_error(result["error"], index=i)
@@ -547,31 +618,9 @@ def main() -> None:
                     if error_tracker:
                         stats = error_tracker.get_stats()
                         print(f"  Stats: {stats['total_errors']}/{stats['total_samples']} samples failed")
-                    break  # Exit the dataset loop
+                    break  # Exit the dataset loop; nothing further is submitted
 
-                # Compute rewards
-                text = result["completion"]
-                try:
-                    r_main = float(
-                        reward_config_auditing(
-                            text,
-                            answer,
-                            fixture_path=resolved_fixture_path,
-                            fixture_type=normalized_fixture_type,
-                        )
-                    )
-                except Exception as e:
-                    r_main = 0.0
-                    record["reward_error"] = str(e)
-                try:
-                    r_format = float(format_reward(text, answer=answer))
-                except Exception:
-                    r_format = 0.0
-
-                record["rewards"] = {
-                    "reward_config_auditing": r_main,
-                    "format_reward": r_format,
-                }
+                submit_next()
 
                 # Report tool usage
                 if include_tools and record["tool_interactions"]: